@@ -0,0 +1,84 @@
+"""
+Сравнение результатов замеров двух версий
+
+Запуск: python -m benchmarks.compare base.json head.json --threshold 0.1
+Завершается с кодом 1, если медианная задержка какого-либо замера
+выросла больше чем на threshold
+"""
+
+import argparse
+import json
+import sys
+from typing import Any
+
+
+def load_results(path: str) -> dict[str, dict[str, Any]]:
+    """
+    Результаты замеров по имени и параметрам
+    """
+
+    with open(path) as file:
+        report = json.load(file)
+
+    results = {}
+    for result in report['results']:
+        params = ','.join(f'{k}={v}' for k, v in result['params'].items())
+        results[f'{result["name"]}[{params}]'] = result
+
+    return results
+
+
+def compare(
+    base: dict[str, dict[str, Any]],
+    head: dict[str, dict[str, Any]],
+    threshold: float,
+) -> tuple[list[str], list[str]]:
+    """
+    Строки отчёта и замеры с ростом медианной задержки выше порога
+
+    Сравниваются только замеры, которые есть в обоих файлах
+    """
+
+    lines = []
+    regressions = []
+    for key in sorted(base.keys() & head.keys()):
+        before = base[key].get('p50_ms')
+        after = head[key].get('p50_ms')
+        if not before or after is None:
+            continue
+
+        change = after / before - 1
+        mark = ''
+        if change > threshold:
+            mark = '  REGRESSION'
+            regressions.append(key)
+        lines.append(
+            f'{key}: p50 {before} -> {after} ms ({change:+.1%}){mark}'
+        )
+
+    return lines, regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base', help='Results of the previous release')
+    parser.add_argument('head', help='Results of the new release')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Allowed relative growth of p50 latency',
+    )
+    args = parser.parse_args(argv)
+
+    lines, regressions = compare(
+        load_results(args.base), load_results(args.head), args.threshold
+    )
+    print('\n'.join(lines))
+    if regressions:
+        print(f'{len(regressions)} regressions', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+import asyncpg
+import redis.asyncio
+from httpx import ASGITransport, AsyncClient
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.core.auth import password_hasher
+from src.core.config import app_settings
+from src.db.db import get_session
+from src.db.redis import get_redis
+from src.main import app
+from src.models import Base
+from src.services.cache import local_cache
+from src.services.storage import storage
+
+URL_PREFIX_AUTH = '/api/v1/users'
+URL_PREFIX_FILE = '/api/v1/files'
+BENCH_USER = {'login': 'bench_user', 'password': 'bench_password'}
+
+
+@dataclass
+class BenchEnvironment:
+    client: AsyncClient
+    headers: dict[str, str]
+    token: str
+    user_id: int
+    engine: AsyncEngine
+    session_factory: async_sessionmaker
+    cache: Redis
+
+
+async def recreate_database(create: bool) -> None:
+    """
+    Удаление и создание базы данных для замеров
+    """
+
+    conn = await asyncpg.connect(
+        app_settings.dsn.replace('postgresql+asyncpg', 'postgresql')
+    )
+    try:
+        await conn.execute(
+            f'DROP DATABASE IF EXISTS {app_settings.postgres_bench_db}'
+        )
+        if create:
+            await conn.execute(
+                f'CREATE DATABASE {app_settings.postgres_bench_db}'
+            )
+    finally:
+        await conn.close()
+
+
+@asynccontextmanager
+async def bench_environment() -> AsyncIterator[BenchEnvironment]:
+    """
+    Приложение с отдельными базой данных, базой Redis и бакетом
+
+    Запросы выполняются внутри процесса через ASGI, поэтому замеры
+    включают работу приложения и сервисов без сетевого стека HTTP.
+    После замеров все данные удаляются
+    """
+
+    await recreate_database(create=True)
+    engine = create_async_engine(
+        app_settings.dsn_bench, pool_size=20, max_overflow=0
+    )
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    cache = redis.asyncio.from_url(
+        f'{app_settings.redis_url}/{app_settings.redis_bench_db}'
+    )
+    bucket_name = storage.bucket_name
+
+    async def override_get_session() -> AsyncIterator[AsyncSession]:
+        async with session_factory() as session:
+            yield session
+
+    async def override_get_redis() -> AsyncIterator[Redis]:
+        yield cache
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await cache.flushdb()
+        local_cache.clear()
+        await storage.start()
+        await storage.create_backet(app_settings.minio_bench_bucket_name)
+        app.dependency_overrides[get_session] = override_get_session
+        app.dependency_overrides[get_redis] = override_get_redis
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url='http://bench', timeout=None
+        ) as client:
+            response = await client.post(
+                f'{URL_PREFIX_AUTH}/register', json=BENCH_USER
+            )
+            response.raise_for_status()
+            user_id = response.json()['id']
+            response = await client.post(
+                f'{URL_PREFIX_AUTH}/auth', json=BENCH_USER
+            )
+            response.raise_for_status()
+            token = response.json()['access_token']
+
+            yield BenchEnvironment(
+                client=client,
+                headers={'Authorization': f'Bearer {token}'},
+                token=token,
+                user_id=user_id,
+                engine=engine,
+                session_factory=session_factory,
+                cache=cache,
+            )
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        app.dependency_overrides.pop(get_redis, None)
+        await storage.delete_bucket()
+        storage.bucket_name = bucket_name
+        await storage.close()
+        await cache.flushdb()
+        await cache.aclose()
+        await engine.dispose()
+        await recreate_database(create=False)
+        password_hasher.shutdown()
@@ -0,0 +1,70 @@
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга
+    """
+
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    *,
+    concurrency: int = 1,
+    warmup: int = 1,
+    bytes_per_op: int | None = None,
+    **params: Any,
+) -> dict[str, Any]:
+    """
+    Измерение задержки и пропускной способности операции
+
+    operation получает номер итерации. Прогревочные итерации
+    не учитываются, итерации выполняются не больше чем по concurrency
+    одновременно
+    """
+
+    for i in range(warmup):
+        await operation(-1 - i)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'name': name,
+        'params': params,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'elapsed_sec': round(elapsed, 6),
+        'ops_per_sec': round(iterations / elapsed, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'min_ms': round(min(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+    }
+    if bytes_per_op is not None:
+        result['mib_per_sec'] = round(
+            bytes_per_op * iterations / elapsed / 2**20, 3
+        )
+
+    return result
@@ -0,0 +1,200 @@
+"""
+Замеры производительности API файлов
+
+Запуск: python -m benchmarks.run --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+from .environment import bench_environment
+from .scenarios import (
+    bench_auth,
+    bench_cache,
+    bench_codec,
+    bench_listing,
+    bench_transfer,
+)
+
+SCENARIOS = ('auth', 'listing', 'cache', 'codec', 'transfer')
+TABLE_COLUMNS = ('p50_ms', 'p95_ms', 'p99_ms', 'ops_per_sec', 'mib_per_sec')
+
+
+def parse_size(value: str) -> int:
+    """
+    Размер в байтах с необязательным суффиксом K, M или G
+    """
+
+    units = {'K': 2**10, 'M': 2**20, 'G': 2**30}
+    value = value.strip().upper().removesuffix('IB').removesuffix('B')
+    if value and value[-1] in units:
+        return int(value[:-1]) * units[value[-1]]
+
+    return int(value)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--scenarios',
+        default=','.join(SCENARIOS),
+        help=f'Comma-separated scenarios from {", ".join(SCENARIOS)}',
+    )
+    parser.add_argument(
+        '--rows',
+        type=int,
+        default=1_000_000,
+        help='Seeded file rows for listing and search',
+    )
+    parser.add_argument(
+        '--files-per-folder',
+        type=int,
+        default=1000,
+        help='Seeded files per folder',
+    )
+    parser.add_argument(
+        '--sizes',
+        default='1K,1M,16M,64M',
+        help='Comma-separated upload and download sizes',
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=200,
+        help='Iterations of listing, search, cache lookups and codec',
+    )
+    parser.add_argument(
+        '--transfer-iterations',
+        type=int,
+        default=10,
+        help='Uploads and downloads per file size',
+    )
+    parser.add_argument(
+        '--auth-iterations',
+        type=int,
+        default=20,
+        help='Logins, token checks are measured ten times as often',
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Concurrent requests for listing, search and transfer',
+    )
+    parser.add_argument(
+        '--output', help='JSON results file, stdout if not set'
+    )
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',')]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+    if 'cache' in args.scenarios and 'listing' not in args.scenarios:
+        parser.error('The cache scenario uses files seeded by listing')
+    args.sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    return args
+
+
+def git_commit() -> str | None:
+    """
+    Коммит, на котором выполнены замеры
+    """
+
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_table(results: list[dict[str, Any]]) -> str:
+    """
+    Результаты в виде таблицы для чтения человеком
+    """
+
+    rows = [('name', *TABLE_COLUMNS)]
+    for result in results:
+        params = ','.join(f'{k}={v}' for k, v in result['params'].items())
+        rows.append(
+            (
+                f'{result["name"]}[{params}]',
+                *(str(result.get(column, '-')) for column in TABLE_COLUMNS),
+            )
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return '\n'.join(
+        '  '.join(cell.ljust(width) for cell, width in zip(row, widths))
+        for row in rows
+    )
+
+
+async def run(args: argparse.Namespace) -> list[dict[str, Any]]:
+    results = []
+    async with bench_environment() as env:
+        if 'auth' in args.scenarios:
+            results += await bench_auth(env, args.auth_iterations)
+        if 'listing' in args.scenarios:
+            results += await bench_listing(
+                env,
+                args.rows,
+                args.files_per_folder,
+                args.iterations,
+                args.concurrency,
+            )
+        if 'cache' in args.scenarios:
+            results += await bench_cache(env, args.iterations)
+        if 'codec' in args.scenarios:
+            results += await bench_codec(args.iterations)
+        if 'transfer' in args.scenarios:
+            results += await bench_transfer(
+                env, args.sizes, args.transfer_iterations, args.concurrency
+            )
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    started_at = datetime.now(timezone.utc)
+    results = asyncio.run(run(args))
+
+    report = {
+        'meta': {
+            'started_at': started_at.isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {
+                name: value
+                for name, value in vars(args).items()
+                if name != 'output'
+            },
+        },
+        'results': results,
+    }
+
+    print(format_table(results), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Callable
+
+from httpx import Response
+from sqlalchemy import select
+
+from src.core.auth import get_current_user
+from src.models.file import File as FileModel
+from src.schemas.file import FileInDB
+from src.services.cache import local_cache
+from src.services.file import file_crud
+
+from .environment import (
+    BENCH_USER,
+    URL_PREFIX_AUTH,
+    URL_PREFIX_FILE,
+    BenchEnvironment,
+)
+from .measure import measure
+from .seed import SEED_ROOT, seed_files, seed_folder
+
+PAGE_SIZE = 100
+CODEC_BATCH = 1000
+Results = list[dict[str, Any]]
+
+
+def check(response: Response, status_code: int) -> None:
+    """
+    Проверка ответа, ошибочные ответы не должны попадать в замеры
+    """
+
+    if response.status_code != status_code:
+        raise RuntimeError(
+            f'{response.request.method} {response.request.url} returned '
+            f'{response.status_code}: {response.text[:200]}'
+        )
+
+
+async def bench_auth(env: BenchEnvironment, iterations: int) -> Results:
+    """
+    Затраты на вход и на проверку токена
+    """
+
+    async def login(i: int) -> None:
+        response = await env.client.post(
+            f'{URL_PREFIX_AUTH}/auth', json=BENCH_USER
+        )
+        check(response, 200)
+
+    async def current_user(i: int) -> None:
+        async with env.session_factory() as db:
+            await get_current_user(env.token, db, env.cache)
+
+    async def status(i: int) -> None:
+        response = await env.client.get(
+            f'{URL_PREFIX_AUTH}/status', headers=env.headers
+        )
+        check(response, 200)
+
+    return [
+        await measure('auth_login', login, iterations),
+        await measure('auth_current_user', current_user, iterations * 10),
+        await measure('auth_status_request', status, iterations * 10),
+    ]
+
+
+async def bench_transfer(
+    env: BenchEnvironment, sizes: list[int], iterations: int, concurrency: int
+) -> Results:
+    """
+    Пропускная способность загрузки и скачивания по размерам файлов
+
+    Содержимое каждой загрузки отличается номером итерации в первых
+    байтах, чтобы дедупликация не подменяла загрузку поиском блоба
+    """
+
+    results = []
+    for size in sizes:
+        payload = os.urandom(size)
+        folder = f'/transfer/{size}/'
+
+        async def upload(i: int) -> None:
+            content = (i.to_bytes(8, 'big', signed=True) + payload)[:size]
+            response = await env.client.put(
+                f'{URL_PREFIX_FILE}/upload',
+                params={'path': f'{folder}{i}.bin'},
+                content=content,
+                headers=env.headers,
+            )
+            check(response, 201)
+
+        async def download(i: int) -> None:
+            response = await env.client.get(
+                f'{URL_PREFIX_FILE}/download',
+                params={'path': f'{folder}{i % iterations}.bin'},
+                headers=env.headers,
+            )
+            check(response, 200)
+
+        for name, operation in (('upload', upload), ('download', download)):
+            results.append(
+                await measure(
+                    name,
+                    operation,
+                    iterations,
+                    concurrency=concurrency,
+                    bytes_per_op=size,
+                    size=size,
+                )
+            )
+
+    return results
+
+
+async def bench_listing(
+    env: BenchEnvironment,
+    rows: int,
+    files_per_folder: int,
+    iterations: int,
+    concurrency: int,
+) -> Results:
+    """
+    Задержка списков и поиска на наполненной таблице файлов
+    """
+
+    seed_sec = await seed_files(
+        env.engine, env.user_id, rows, files_per_folder
+    )
+    middle = rows // 2
+    folder = seed_folder(middle, files_per_folder)
+
+    response = await env.client.get(
+        f'{URL_PREFIX_FILE}/',
+        params={'offset': middle, 'limit': PAGE_SIZE},
+        headers=env.headers,
+    )
+    check(response, 200)
+    cursor = response.headers['X-Next-Cursor']
+    response = await env.client.get(
+        f'{URL_PREFIX_FILE}/', params={'limit': PAGE_SIZE}, headers=env.headers
+    )
+    check(response, 200)
+    etag = response.headers['ETag']
+
+    requests = {
+        'list_first_page': ('GET', '/', {}, None, {}),
+        'list_offset_page': ('GET', '/', {'offset': middle}, None, {}),
+        'list_cursor_page': ('GET', '/', {'cursor': cursor}, None, {}),
+        'list_folder': ('GET', '/folder', {'path': folder}, None, {}),
+        'list_not_modified': ('GET', '/', {}, None, {'If-None-Match': etag}),
+        'search_extension': (
+            'POST', '/search', {}, {'extension': 'pdf'}, {}
+        ),
+        'search_query': (
+            'POST', '/search', {}, {'query': f'%file_{middle}.%'}, {}
+        ),
+        'search_path': ('POST', '/search', {}, {'path': folder}, {}),
+    }
+
+    results = []
+    for name, (method, url, params, body, headers) in requests.items():
+        if method == 'GET':
+            params = {'limit': PAGE_SIZE, **params}
+        else:
+            body = {'limit': PAGE_SIZE, **body}
+        expected = 304 if 'If-None-Match' in headers else 200
+
+        async def request(i: int) -> None:
+            response = await env.client.request(
+                method,
+                f'{URL_PREFIX_FILE}{url}',
+                params=params,
+                json=body,
+                headers={**env.headers, **headers},
+            )
+            check(response, expected)
+
+        results.append(
+            await measure(
+                name,
+                request,
+                iterations,
+                concurrency=concurrency,
+                rows=rows,
+                page_size=PAGE_SIZE,
+            )
+        )
+
+    results.append(
+        {
+            'name': 'seed',
+            'params': {'rows': rows, 'files_per_folder': files_per_folder},
+            'iterations': 1,
+            'elapsed_sec': round(seed_sec, 3),
+            'ops_per_sec': round(rows / seed_sec, 3),
+        }
+    )
+
+    return results
+
+
+async def bench_cache(env: BenchEnvironment, iterations: int) -> Results:
+    """
+    Получение метаданных файла по id через уровни кеша
+
+    Проходы выполняются по одним и тем же файлам: первый находит
+    их только в базе данных, второй - в Redis после очистки локального
+    кеша перед каждым запросом, третий - в локальном кеше, который
+    заполняется прогревом
+    """
+
+    async with env.session_factory() as db:
+        results = await db.execute(
+            select(FileModel.id)
+            .where(FileModel.user_id == env.user_id)
+            .where(FileModel.path.startswith(SEED_ROOT))
+            .limit(iterations)
+        )
+        ids = results.scalars().all()
+
+    async def lookup(i: int) -> None:
+        async with env.session_factory() as db:
+            file = await file_crud.get_for_user(
+                db=db,
+                cache=env.cache,
+                id=ids[i % len(ids)],
+                user_id=env.user_id,
+            )
+        if file is None:
+            raise RuntimeError(f'File {ids[i % len(ids)]} not found')
+
+    async def lookup_shared(i: int) -> None:
+        local_cache.clear()
+        await lookup(i)
+
+    local_cache.clear()
+    return [
+        await measure('cache_miss', lookup, len(ids), warmup=0),
+        await measure('cache_redis_hit', lookup_shared, len(ids)),
+        await measure(
+            'cache_local_hit', lookup, len(ids), warmup=len(ids)
+        ),
+    ]
+
+
+async def bench_codec(iterations: int) -> Results:
+    """
+    Декодирование метаданных файла из кеша
+
+    Сравниваются разбор JSON с созданием модели из словаря и
+    model_validate_json. Каждая итерация обрабатывает CODEC_BATCH записей,
+    us_per_op - медиана в микросекундах на одну запись
+    """
+
+    file = FileInDB(
+        id=uuid.uuid4(),
+        user_id=1,
+        name='quarterly_report.pdf',
+        path='/documents/reports/2024/',
+        size=5 * 2**20,
+        hash='e3b0c442' * 8,
+        created_at=datetime(2024, 6, 1, 12, 30, 15, 123456),
+        updated_at=datetime(2024, 6, 2, 8, 0, 0, 654321),
+    )
+    data = file.model_dump_json()
+    loaders: dict[str, Callable[[str], FileInDB]] = {
+        'json_loads': lambda value: FileInDB(**json.loads(value)),
+        'validate_json': FileInDB.model_validate_json,
+    }
+
+    results = []
+    for name, loads in loaders.items():
+        if loads(data) != file:
+            raise RuntimeError(f'{name} does not round-trip')
+
+        async def decode(i: int) -> None:
+            for _ in range(CODEC_BATCH):
+                loads(data)
+
+        result = await measure(
+            'codec_decode',
+            decode,
+            iterations,
+            warmup=10,
+            loader=name,
+            batch=CODEC_BATCH,
+        )
+        result['us_per_op'] = round(result['p50_ms'] * 1000 / CODEC_BATCH, 3)
+        results.append(result)
+
+    return results
@@ -0,0 +1,83 @@
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SEED_ROOT = '/seed/'
+SEED_EXTENSIONS = ('txt', 'jpg', 'png', 'pdf', 'docx', 'csv', 'json', 'mp4')
+SEED_BATCH_ROWS = 100_000
+
+INSERT_FILES = text(
+    """
+    INSERT INTO file (id, user_id, name, path, size, created_at, updated_at)
+    SELECT
+        gen_random_uuid(),
+        :user_id,
+        'file_' || n || '.'
+            || (CAST(:extensions AS text[]))[n % :extension_count + 1],
+        CAST(:root AS text) || 'dir_'
+            || lpad((n / :files_per_folder)::text, 6, '0') || '/',
+        n % 1048576 + 1,
+        now() at time zone 'utc',
+        now() at time zone 'utc'
+    FROM generate_series(CAST(:start AS bigint), :stop - 1) AS n
+    """
+)
+INSERT_FOLDER_USAGE = text(
+    """
+    INSERT INTO folder_usage (user_id, path, used, files)
+    SELECT user_id, path, sum(size), count(*)
+    FROM file
+    WHERE user_id = :user_id AND path LIKE CAST(:root AS text) || '%'
+    GROUP BY user_id, path
+    """
+)
+
+
+def seed_folder(number: int, files_per_folder: int) -> str:
+    """
+    Папка файла с заданным номером
+    """
+
+    return f'{SEED_ROOT}dir_{number // files_per_folder:06d}/'
+
+
+async def seed_files(
+    engine: AsyncEngine, user_id: int, rows: int, files_per_folder: int
+) -> float:
+    """
+    Наполнение таблицы файлов метаданными без содержимого
+
+    Файлы распределяются по папкам по files_per_folder и по расширениям
+    SEED_EXTENSIONS. Строки вставляются пакетами на стороне базы данных,
+    после чего пересчитываются счётчики папок и статистика планировщика.
+    Возвращает время наполнения в секундах
+    """
+
+    started = time.perf_counter()
+    for start in range(0, rows, SEED_BATCH_ROWS):
+        async with engine.begin() as conn:
+            await conn.execute(
+                INSERT_FILES,
+                {
+                    'user_id': user_id,
+                    'extensions': list(SEED_EXTENSIONS),
+                    'extension_count': len(SEED_EXTENSIONS),
+                    'root': SEED_ROOT,
+                    'files_per_folder': files_per_folder,
+                    'start': start,
+                    'stop': min(start + SEED_BATCH_ROWS, rows),
+                },
+            )
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            INSERT_FOLDER_USAGE, {'user_id': user_id, 'root': SEED_ROOT}
+        )
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text('ANALYZE file'))
+        await conn.execute(text('ANALYZE folder_usage'))
+
+    return time.perf_counter() - started
@@ -1,87 +1,272 @@
-from typing import Any
+import hashlib
+from contextlib import asynccontextmanager, suppress
+from typing import Any, AsyncIterator, Literal
 from uuid import UUID
 
-from aiohttp import ClientConnectorError
 from fastapi import (
     APIRouter,
     Depends,
+    Header,
     HTTPException,
+    Query,
     Request,
+    Response,
     UploadFile,
     status,
 )
-from fastapi.responses import StreamingResponse
-from miniopy_async import S3Error
+from fastapi.responses import RedirectResponse
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import FormData
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import ClientDisconnect
 
 from src.core.auth import get_current_user
-from src.core.config import logger
+from src.core.config import app_settings, logger
 from src.core.utils import is_uuid
 from src.db.db import get_session
 from src.db.redis import get_redis
 from src.models import User
-from src.schemas.file import FileCreate, FileInDB, SearchOptions
+from src.schemas.file import (
+    BatchUploadResult,
+    FileInDB,
+    FilesDelete,
+    FilesDeleted,
+    SearchOptions,
+    UploadPrecheck,
+    UploadPrecheckResult,
+    UploadProgress,
+)
+from src.services.archive import build_archive_response
+from src.services.blob import hash_chunks, staging_object_name
+from src.services.download import (
+    CACHE_CONTROL,
+    RangeNotSatisfiable,
+    build_download_response,
+    etag_matches,
+    file_validators,
+    not_modified,
+    not_modified_response,
+    resolve_ranges,
+)
 from src.services.file import (
+    create_upload_challenge,
+    decode_cursor,
+    delete_files_by_list,
+    delete_folder,
+    encode_cursor,
     file_crud,
+    get_download_url,
+    get_listing_etag,
+    get_upload_progress,
+    iter_upload_file,
+    save_existing_content,
+    save_file_content,
+    save_files_batch,
     set_file_name,
     set_file_path,
+    set_upload_progress,
     split_path_and_name,
+    verify_upload_proof,
 )
-from src.services.minio import minio_handler
+from src.services.storage import STORAGE_ERRORS, storage
 
 file_router = APIRouter()
 
 
+def set_next_cursor(
+    response: Response, files: list[FileInDB], limit: int
+) -> list[FileInDB]:
+    """
+    Обрезка лишнего файла и передача курсора следующей страницы
+
+    Курсор передаётся в заголовке X-Next-Cursor, если страница не последняя
+    """
+
+    if len(files) > limit:
+        files = files[:limit]
+        response.headers['X-Next-Cursor'] = encode_cursor(files[-1])
+
+    return files
+
+
+def parse_cursor(cursor: str | None) -> tuple[str, str] | None:
+    """
+    Разбор курсора из параметров запроса
+    """
+
+    if cursor is None:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor',
+        )
+
+
+def check_listing_etag(
+    response: Response, etag: str, if_none_match: str | None
+) -> Response | None:
+    """
+    Ответ 304, если у клиента актуальный список, иначе передача ETag
+    """
+
+    if if_none_match and etag_matches(if_none_match, etag):
+        return not_modified_response({'ETag': etag})
+
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return None
+
+
 @file_router.get(
     '/',
     response_model=list[FileInDB],
     summary='Получение файлов',
-    description='Получение списка загруженных пользователем файлов',
+    description=(
+        'Получение списка загруженных пользователем файлов. '
+        'Курсор следующей страницы передаётся в заголовке X-Next-Cursor'
+    ),
 )
 async def get_files(
     request: Request,
+    response: Response,
     *,
     db: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
-    offset: int = 0,
-    limit: int = 10,
+    cache: Redis = Depends(get_redis),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
 ) -> Any:
     """
     Получение списка загруженных пользователем файлов
     """
 
+    etag = await get_listing_etag(cache, user.id, None, offset, limit, cursor)
+    if cached := check_listing_etag(response, etag, if_none_match):
+        return cached
+
     files = await file_crud.get_multi_for_user(
-        db=db, user_id=user.id, offset=offset, limit=limit
+        db=db,
+        user_id=user.id,
+        offset=offset,
+        limit=limit + 1,
+        cursor=parse_cursor(cursor),
     )
 
-    return files
+    return set_next_cursor(response, files, limit)
 
 
 @file_router.get(
     '/folder',
     response_model=list[FileInDB],
     summary='Получение файлов из папки',
-    description='Получение списка файлов в папке',
+    description=(
+        'Получение списка файлов в папке. '
+        'Курсор следующей страницы передаётся в заголовке X-Next-Cursor'
+    ),
 )
 async def get_files_in_folder(
     request: Request,
+    response: Response,
     *,
     db: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
     path: str,
-    offset: int = 0,
-    limit: int = 10,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
 ) -> Any:
     """
     Получение списка файлов в папке
     """
 
+    etag = await get_listing_etag(cache, user.id, path, offset, limit, cursor)
+    if cached := check_listing_etag(response, etag, if_none_match):
+        return cached
+
     files = await file_crud.get_multi_for_path(
-        db=db, user_id=user.id, path=path, offset=offset, limit=limit
+        db=db,
+        user_id=user.id,
+        path=path,
+        offset=offset,
+        limit=limit + 1,
+        cursor=parse_cursor(cursor),
     )
 
-    return files
+    return set_next_cursor(response, files, limit)
+
+
+async def save_file(
+    *,
+    db: AsyncSession,
+    cache: Redis,
+    user: User,
+    file_path: str,
+    file_name: str,
+    chunks: AsyncIterator[bytes],
+    size: int | None = None,
+) -> Any:
+    """
+    Потоковое сохранение файла в хранилище
+    """
+
+    progress = UploadProgress(
+        path=file_path + file_name, received=0, total=size
+    )
+
+    async def report_progress(received: int) -> None:
+        progress.received = received
+        await set_upload_progress(
+            cache=cache, user_id=user.id, progress=progress
+        )
+
+    staging_name = staging_object_name()
+    content_hash = hashlib.sha256()
+    try:
+        written = await storage.write_stream(
+            staging_name,
+            hash_chunks(chunks, content_hash),
+            progress=report_progress,
+        )
+        file = await save_file_content(
+            db,
+            cache,
+            user_id=user.id,
+            path=file_path,
+            name=file_name,
+            hash=content_hash.hexdigest(),
+            size=written,
+            staging_name=staging_name,
+        )
+    except ClientDisconnect:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Upload interrupted',
+        )
+    except STORAGE_ERRORS as e:
+        error_msg = f'Storage error occurred: {e}'
+        logger.error(error_msg)
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_msg,
+        )
+    finally:
+        with suppress(*STORAGE_ERRORS):
+            await storage.remove([staging_name])
+
+    logger.info(f'Uploaded {file_path}{file_name}: {written} bytes')
+
+    return file
 
 
 @file_router.post(
@@ -104,37 +289,308 @@ async def upload(
     Сохранение файла в хранилище
     """
 
-    file_name = set_file_name(path, file)
-    file_path = set_file_path(path)
+    return await save_file(
+        db=db,
+        cache=cache,
+        user=user,
+        file_path=set_file_path(path),
+        file_name=set_file_name(path, file),
+        chunks=iter_upload_file(file),
+        size=file.size,
+    )
+
 
-    file_in_db = await file_crud.get_file_on_path(
-        db=db, cache=cache, user_id=user.id, path=file_path, name=file_name
+@file_router.put(
+    '/upload',
+    response_model=FileInDB,
+    status_code=status.HTTP_201_CREATED,
+    summary='Потоковое сохранение файла',
+    description='Сохранение файла из тела запроса без буферизации',
+)
+async def upload_stream(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    path: str,
+    content_length: int | None = Header(None, ge=0),
+) -> Any:
+    """
+    Сохранение файла из тела запроса без буферизации
+    """
+
+    file_path, file_name = split_path_and_name(path)
+    if not file_name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='File name is required',
+        )
+
+    return await save_file(
+        db=db,
+        cache=cache,
+        user=user,
+        file_path=file_path,
+        file_name=file_name,
+        chunks=request.stream(),
+        size=content_length,
     )
 
-    if not file_in_db:
-        obj = FileCreate(
-            user_id=user.id, name=file_name, path=file_path, size=file.size
+
+class BatchTooLarge(MultiPartException):
+    """
+    Тело пакетной загрузки больше batch_upload_max_bytes
+    """
+
+
+async def limit_batch_stream(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[bytes]:
+    """
+    Чтение тела пакетной загрузки с ограничением общего размера
+    """
+
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > app_settings.batch_upload_max_bytes:
+            raise BatchTooLarge('Batch upload is too large')
+        yield chunk
+
+
+@asynccontextmanager
+async def batch_form(
+    request: Request, content_length: int | None
+) -> AsyncIterator[FormData]:
+    """
+    Разбор multipart-формы пакетной загрузки
+
+    Части до 1 МБ Starlette держит в памяти, поэтому общий размер
+    тела ограничен: по Content-Length до чтения и по прочитанным
+    байтам при разборе
+    """
+
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail='Batch upload is too large',
+    )
+    if (
+        content_length is not None
+        and content_length > app_settings.batch_upload_max_bytes
+    ):
+        raise too_large
+
+    content_type = request.headers.get('content-type', '')
+    if not content_type.startswith('multipart/form-data'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='No files to upload',
         )
-        file_in_db = await file_crud.create(db=db, obj=obj)
 
-    file_data = await file.read()
+    parser = MultiPartParser(
+        request.headers,
+        limit_batch_stream(request.stream()),
+        max_files=app_settings.batch_upload_max_files,
+    )
+    try:
+        form = await parser.parse()
+    except BatchTooLarge:
+        raise too_large
+    except MultiPartException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=e.message
+        )
 
     try:
-        await minio_handler.write(
-            file_in_db.id, file_data, file.size, file_name
+        yield form
+    finally:
+        await form.close()
+
+
+@file_router.post(
+    '/upload/batch',
+    response_model=list[BatchUploadResult],
+    summary='Пакетное сохранение файлов',
+    description=(
+        'Сохранение нескольких файлов из поля files multipart-запроса '
+        'в папку path. Имена файлов могут содержать вложенные папки. '
+        'Размер запроса ограничен BATCH_UPLOAD_MAX_BYTES'
+    ),
+)
+async def upload_batch(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    path: str = '/',
+    content_length: int | None = Header(None, ge=0),
+) -> Any:
+    """
+    Сохранение нескольких файлов из одного запроса
+    """
+
+    folder = set_file_path(path if path.endswith('/') else path + '/')
+    async with batch_form(request, content_length) as form:
+        files = [
+            (*split_path_and_name(folder + (file.filename or '')), file)
+            for file in form.getlist('files')
+            if isinstance(file, StarletteUploadFile)
+        ]
+        if not files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='No files to upload',
+            )
+
+        try:
+            results = await save_files_batch(
+                db, cache, user_id=user.id, files=files
+            )
+        except STORAGE_ERRORS as e:
+            error_msg = f'Storage error occurred: {e}'
+            logger.error(error_msg)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=error_msg,
+            )
+
+    logger.info(f'Uploaded {len(files)} files to {folder}')
+
+    return results
+
+
+@file_router.post(
+    '/upload/precheck',
+    response_model=UploadPrecheckResult,
+    summary='Мгновенная загрузка',
+    description=(
+        'Создание файла по хешу SHA-256 и размеру содержимого, '
+        'если такое содержимое уже есть в хранилище. Первый запрос '
+        'возвращает challenge: диапазон содержимого, хеш SHA-256 '
+        'которого нужно передать в proof вместе с id challenge '
+        'повторным запросом'
+    ),
+)
+async def upload_precheck(
+    *,
+    db: AsyncSession = Depends(get_session),
+    cache: Redis = Depends(get_redis),
+    user: User = Depends(get_current_user),
+    obj: UploadPrecheck,
+) -> Any:
+    """
+    Создание файла по хешу содержимого без передачи данных
+
+    Знания хеша недостаточно: клиент доказывает, что у него есть
+    содержимое, хешем случайного диапазона, выбранного сервисом
+    """
+
+    if not app_settings.instant_upload_enabled:
+        return UploadPrecheckResult(exists=False)
+
+    file_path, file_name = split_path_and_name(obj.path)
+    if not file_name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='File name is required',
         )
-    except (S3Error, ClientConnectorError) as e:
-        error_msg = f'Minio error occurred: {e}'
-        logger.error(error_msg)
 
-        await file_crud.delete(db=db, id=file_in_db.id)
+    if obj.challenge is None or obj.proof is None:
+        challenge = await create_upload_challenge(
+            cache, user.id, obj.hash, obj.size
+        )
+        return UploadPrecheckResult(exists=False, challenge=challenge)
+
+    if not await verify_upload_proof(
+        cache,
+        user_id=user.id,
+        hash=obj.hash,
+        size=obj.size,
+        challenge_id=obj.challenge,
+        proof=obj.proof,
+    ):
+        return UploadPrecheckResult(exists=False)
+
+    file = await save_existing_content(
+        db,
+        cache,
+        user_id=user.id,
+        path=file_path,
+        name=file_name,
+        hash=obj.hash,
+        size=obj.size,
+    )
+    if not file:
+        return UploadPrecheckResult(exists=False)
+
+    logger.info(f'Uploaded {file_path}{file_name} by hash {obj.hash}')
+
+    return UploadPrecheckResult(exists=True, file=file)
+
 
+@file_router.get(
+    '/upload/progress',
+    response_model=UploadProgress,
+    summary='Прогресс загрузки',
+    description='Получение прогресса загрузки файла',
+)
+async def get_upload_progress_for_path(
+    request: Request,
+    *,
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    path: str,
+) -> Any:
+    """
+    Получение прогресса загрузки файла
+    """
+
+    file_path, file_name = split_path_and_name(path)
+    progress = await get_upload_progress(
+        cache=cache, user_id=user.id, path=file_path, name=file_name
+    )
+    if not progress:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Upload not found',
+        )
+
+    return progress
+
+
+async def redirect_to_storage(
+    *, cache: Redis, user: User, file: FileInDB
+) -> RedirectResponse | None:
+    """
+    Перенаправление на подписанную ссылку для скачивания файла
+
+    None, если хранилище не выдаёт ссылок и файл нужно отдать самому
+    """
+
+    try:
+        download_url = await get_download_url(
+            cache=cache, user_id=user.id, file=file
+        )
+    except STORAGE_ERRORS as e:
+        error_msg = f'Storage error occurred: {e}'
+        logger.error(error_msg)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_msg,
         )
 
-    return file_in_db
+    if download_url is None:
+        return None
+
+    url, ttl = download_url
+    return RedirectResponse(
+        url,
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={'Cache-Control': f'private, max-age={ttl}'},
+    )
 
 
 @file_router.get(
@@ -149,9 +605,19 @@ async def download(
     user: User = Depends(get_current_user),
     cache: Redis = Depends(get_redis),
     path: str | UUID,
+    redirect: bool = app_settings.download_redirect,
+    range_header: str | None = Header(None, alias='Range'),
+    if_range: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
 ) -> Any:
     """
     Получение файла из хранилища
+
+    В режиме redirect клиент перенаправляется на подписанную ссылку
+    хранилища, и содержимое файла не проходит через сервис. Хранилища
+    без подписанных ссылок отдают файл сами. Условные запросы
+    проверяются по метаданным файла без обращения к хранилищу
     """
 
     if is_uuid(path):
@@ -170,28 +636,186 @@ async def download(
             detail='File not found',
         )
 
+    validators = file_validators(file)
+    if not_modified(
+        validators['ETag'],
+        file.updated_at,
+        if_none_match,
+        if_modified_since,
+    ):
+        return not_modified_response(validators)
+
+    if redirect:
+        response = await redirect_to_storage(
+            cache=cache, user=user, file=file
+        )
+        if response:
+            return response
+
     try:
-        response = await minio_handler.read(file.id)
-    except S3Error as e:
-        error_msg = f'Minio error occurred: {e}'
+        ranges = resolve_ranges(file, range_header, if_range)
+        return await build_download_response(file, ranges)
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail='Requested range not satisfiable',
+            headers={'Content-Range': f'bytes */{file.size}'},
+        )
+    except STORAGE_ERRORS as e:
+        error_msg = f'Storage error occurred: {e}'
         logger.error(error_msg)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_msg,
         )
 
-    async def file_iterator():
-        async for chunk in response.content.iter_chunked(32 * 1024):
-            yield chunk
 
-    content_disposition = f'attachment; filename="{file.name}"'
-    return StreamingResponse(
-        file_iterator(),
-        media_type='application/octet-stream',
-        headers={'Content-Disposition': content_disposition},
+@file_router.get(
+    '/download/folder',
+    summary='Получение папки архивом',
+    description=(
+        'Получение ZIP-архива со всеми файлами папки и её подпапок. '
+        'Архив формируется потоково, без сжатия или со сжатием deflate'
+    ),
+)
+async def download_folder(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    path: str,
+    compression: Literal['stored', 'deflate'] = 'stored',
+) -> Any:
+    """
+    Получение ZIP-архива с файлами папки
+    """
+
+    folder = set_file_path(path if path.endswith('/') else f'{path}/')
+    files = await file_crud.get_all_in_folder(
+        db=db, user_id=user.id, path=folder
+    )
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Folder not found',
+        )
+
+    return build_archive_response(folder, files, compression)
+
+
+def raise_delete_error(e: Exception) -> None:
+    """
+    Ответ с ошибкой хранилища при удалении файлов
+    """
+
+    error_msg = f'Storage error occurred: {e}'
+    logger.error(error_msg)
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=error_msg,
     )
 
 
+@file_router.delete(
+    '/',
+    response_model=FilesDeleted,
+    summary='Удаление файла',
+    description='Удаление файла по id или полному пути',
+)
+async def delete(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    path: str | UUID,
+) -> Any:
+    """
+    Удаление файла
+    """
+
+    ids, paths = ([path], []) if is_uuid(path) else ([], [path])
+    try:
+        deleted = await delete_files_by_list(db, cache, user.id, ids, paths)
+    except STORAGE_ERRORS as e:
+        raise_delete_error(e)
+
+    if not deleted.files:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='File not found',
+        )
+
+    return deleted
+
+
+@file_router.post(
+    '/delete',
+    response_model=FilesDeleted,
+    summary='Удаление нескольких файлов',
+    description='Удаление файлов по списку id и полных путей',
+)
+async def delete_many(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    files: FilesDelete,
+) -> Any:
+    """
+    Удаление нескольких файлов
+    """
+
+    if len(files.ids) + len(files.paths) > app_settings.delete_max_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Too many files',
+        )
+
+    try:
+        return await delete_files_by_list(
+            db, cache, user.id, files.ids, files.paths
+        )
+    except STORAGE_ERRORS as e:
+        raise_delete_error(e)
+
+
+@file_router.delete(
+    '/folder',
+    response_model=FilesDeleted,
+    summary='Удаление папки',
+    description='Удаление всех файлов папки и её подпапок',
+)
+async def delete_files_in_folder(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    path: str,
+) -> Any:
+    """
+    Удаление папки со всеми вложенными файлами
+    """
+
+    folder = set_file_path(path if path.endswith('/') else f'{path}/')
+    try:
+        deleted = await delete_folder(db, cache, user.id, folder)
+    except STORAGE_ERRORS as e:
+        raise_delete_error(e)
+
+    if not deleted.files:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Folder not found',
+        )
+
+    logger.info(f'Deleted {deleted.files} files from {folder}')
+
+    return deleted
+
+
 @file_router.post(
     '/search',
     response_model=list[FileInDB],
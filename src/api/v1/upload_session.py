@@ -0,0 +1,262 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+
+from src.core.auth import get_current_user
+from src.core.config import logger
+from src.db.db import get_session
+from src.db.redis import get_redis
+from src.models import User
+from src.schemas.file import FileInDB
+from src.schemas.upload_session import (
+    UploadSession,
+    UploadSessionCreate,
+    UploadSessionState,
+)
+from src.services.file import split_path_and_name
+from src.services.storage import STORAGE_ERRORS, UploadNotFound
+from src.services.upload_session import (
+    UploadSessionIncomplete,
+    UploadSessionTooLarge,
+    chunk_length,
+    claim_upload_session,
+    complete_upload_session,
+    create_upload_session,
+    get_upload_session,
+    remove_upload_session,
+    upload_chunk,
+)
+
+upload_session_router = APIRouter()
+
+
+def raise_storage_error(e: Exception) -> None:
+    """
+    Ответ с ошибкой хранилища
+
+    Multipart загрузка брошенной сессии уже отменена,
+    поэтому для неё возвращается 404
+    """
+
+    if isinstance(e, UploadNotFound):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Upload session not found',
+        )
+
+    error_msg = f'Storage error occurred: {e}'
+    logger.error(error_msg)
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=error_msg,
+    )
+
+
+async def get_session_or_404(
+    cache: Redis, user: User, session_id: str
+) -> UploadSessionState:
+    """
+    Получение сессии загрузки пользователя или ответ 404
+    """
+
+    session = await get_upload_session(cache, user.id, session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Upload session not found',
+        )
+
+    return session
+
+
+async def read_chunk(request: Request, size: int) -> bytes:
+    """
+    Чтение части из тела запроса с проверкой размера
+    """
+
+    data = bytearray()
+    try:
+        async for chunk in request.stream():
+            data += chunk
+            if len(data) > size:
+                break
+    except ClientDisconnect:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Upload interrupted',
+        )
+
+    if len(data) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Chunk size must be {size} bytes',
+        )
+
+    return bytes(data)
+
+
+@upload_session_router.post(
+    '/',
+    response_model=UploadSession,
+    status_code=status.HTTP_201_CREATED,
+    summary='Создание сессии загрузки',
+    description=(
+        'Создание сессии загрузки файла частями. Части размером chunk_size '
+        'можно загружать в любом порядке и параллельно. Файл должен '
+        'помещаться в 10000 частей'
+    ),
+)
+async def create(
+    request: Request,
+    *,
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    obj: UploadSessionCreate,
+) -> Any:
+    """
+    Создание сессии загрузки файла частями
+    """
+
+    file_path, file_name = split_path_and_name(obj.path)
+    if not file_name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='File name is required',
+        )
+
+    try:
+        return await create_upload_session(
+            cache, user.id, file_path + file_name, obj.size
+        )
+    except UploadSessionTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    except STORAGE_ERRORS as e:
+        raise_storage_error(e)
+
+
+@upload_session_router.get(
+    '/{session_id}',
+    response_model=UploadSession,
+    summary='Состояние сессии загрузки',
+    description='Получение сессии загрузки с номерами полученных частей',
+)
+async def get(
+    request: Request,
+    *,
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    session_id: str,
+) -> Any:
+    """
+    Получение состояния сессии загрузки
+    """
+
+    return await get_session_or_404(cache, user, session_id)
+
+
+@upload_session_router.put(
+    '/{session_id}/chunks/{number}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary='Загрузка части',
+    description=(
+        'Загрузка части с номером от 1 из тела запроса. '
+        'Повторная загрузка части заменяет предыдущую'
+    ),
+)
+async def put_chunk(
+    request: Request,
+    *,
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    session_id: str,
+    number: int = Path(ge=1),
+) -> None:
+    """
+    Загрузка части файла
+    """
+
+    session = await get_session_or_404(cache, user, session_id)
+    if number > session.chunks:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Chunk number must be at most {session.chunks}',
+        )
+
+    data = await read_chunk(request, chunk_length(session, number))
+    try:
+        await upload_chunk(cache, session, number, data)
+    except STORAGE_ERRORS as e:
+        raise_storage_error(e)
+
+
+@upload_session_router.post(
+    '/{session_id}/complete',
+    response_model=FileInDB,
+    status_code=status.HTTP_201_CREATED,
+    summary='Завершение сессии загрузки',
+    description='Сборка файла из загруженных частей',
+)
+async def complete(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    session_id: str,
+) -> Any:
+    """
+    Сборка файла из загруженных частей
+    """
+
+    session = await get_session_or_404(cache, user, session_id)
+    try:
+        file = await complete_upload_session(db, cache, session)
+    except UploadSessionIncomplete as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f'Missing chunks: {e.missing}',
+        )
+    except STORAGE_ERRORS as e:
+        raise_storage_error(e)
+
+    if file is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Upload session not found',
+        )
+
+    logger.info(f'Uploaded {session.path} in {session.chunks} chunks')
+
+    return file
+
+
+@upload_session_router.delete(
+    '/{session_id}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary='Отмена сессии загрузки',
+    description='Отмена сессии загрузки и удаление полученных частей',
+)
+async def abort(
+    request: Request,
+    *,
+    user: User = Depends(get_current_user),
+    cache: Redis = Depends(get_redis),
+    session_id: str,
+) -> None:
+    """
+    Отмена сессии загрузки
+    """
+
+    session = await get_session_or_404(cache, user, session_id)
+    if not await claim_upload_session(cache, session.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Upload session not found',
+        )
+
+    await remove_upload_session(cache, session)
@@ -1,17 +1,21 @@
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.auth import (
     authenticate_user,
     create_access_token,
     get_current_user,
+    get_token_version,
     hash_password,
+    revoke_tokens,
 )
 from src.core.config import app_settings
 from src.db.db import get_session
+from src.db.redis import get_redis
 from src.schemas.user import (
     AccessToken,
     Status,
@@ -19,7 +23,7 @@ from src.schemas.user import (
     UserCreate,
     UserLogin,
 )
-from src.services.file import file_crud
+from src.services.folder_usage import folder_usage_crud
 from src.services.user import user_crud
 
 user_router = APIRouter()
@@ -48,7 +52,7 @@ async def register(
             detail='User already exists',
         )
 
-    obj.password = hash_password(obj.password)
+    obj.password = await hash_password(obj.password)
     user = await user_crud.create(db=db, obj=obj)
     return user
 
@@ -63,6 +67,7 @@ async def register(
 async def auth(
     *,
     db: AsyncSession = Depends(get_session),
+    cache: Redis = Depends(get_redis),
     obj: UserLogin,
 ) -> Any:
     """
@@ -82,12 +87,34 @@ async def auth(
     access_token_expires = timedelta(
         seconds=app_settings.access_token_expire_seconds
     )
+    token_version = await get_token_version(cache, user.id)
     access_token = create_access_token(
-        data={"sub": user.login}, expires_delta=access_token_expires
+        data={'sub': user.login, 'uid': user.id, 'ver': token_version},
+        expires_delta=access_token_expires,
     )
     return AccessToken(access_token=access_token, token_type="bearer")
 
 
+@user_router.post(
+    '/revoke',
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary='Отзыв токенов',
+    description='Отзыв всех выданных пользователю токенов',
+)
+async def revoke(
+    *,
+    cache: Redis = Depends(get_redis),
+    user: User = Depends(get_current_user),
+) -> Response:
+    """
+    Отзыв всех выданных пользователю токенов
+    """
+
+    await revoke_tokens(cache, user.id)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @user_router.get(
     '/status',
     response_model=Status,
@@ -104,7 +131,7 @@ async def get_status_files(
     Информация о статусе использования дискового пространства пользователем
     """
 
-    folder_statuses = await file_crud.get_status_for_user(
+    folder_statuses = await folder_usage_crud.get_for_user(
         db=db, user_id=user.id
     )
     user_status = Status(account_id=user.id, folders=folder_statuses)
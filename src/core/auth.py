@@ -1,15 +1,25 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt import InvalidTokenError
 from passlib.context import CryptContext
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.config import app_settings
+from src.core.config import app_settings, logger
 from src.db.db import get_session
+from src.db.redis import get_redis
 from src.schemas.user import User
+from src.services.cache import bump_generations, get_generation, local_cache
 from src.services.user import user_crud
 
 ALGORITHM = 'HS256'
@@ -18,20 +28,127 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth')
 
 
-def hash_password(password: str) -> str:
+class PasswordHasher:
+    """
+    Выполнение хеширования паролей в ограниченном пуле потоков
+
+    bcrypt освобождает GIL, поэтому хеширование в потоках не блокирует
+    цикл событий. При переполнении очереди запросы отклоняются
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hasher'
+        )
+        self.queue_size = queue_size
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполнение функции в пуле с учётом времени ожидания и работы
+        """
+
+        if self.pending >= self.queue_size:
+            self.rejected += 1
+            logger.warning('Password hashing queue is full')
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Too many authentication requests',
+                headers={'Retry-After': '1'},
+            )
+
+        def timed() -> tuple[Any, float, float]:
+            started = time.perf_counter()
+            result = func(*args)
+            return result, started, time.perf_counter()
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            result, started, finished = await loop.run_in_executor(
+                self.executor, timed
+            )
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.wait_seconds += started - submitted
+        self.run_seconds += finished - started
+
+        return result
+
+    def shutdown(self) -> None:
+        """
+        Остановка пула
+        """
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PasswordHasherCollector(Collector):
+    """
+    Метрики пула хеширования паролей
+    """
+
+    def __init__(self, hasher: PasswordHasher) -> None:
+        self.hasher = hasher
+
+    def collect(self) -> Iterator[GaugeMetricFamily | CounterMetricFamily]:
+        yield GaugeMetricFamily(
+            'password_hash_pending',
+            'Password hashing tasks queued or running',
+            value=self.hasher.pending,
+        )
+        yield CounterMetricFamily(
+            'password_hash_completed',
+            'Password hashing tasks completed',
+            value=self.hasher.completed,
+        )
+        yield CounterMetricFamily(
+            'password_hash_rejected',
+            'Password hashing tasks rejected because the queue was full',
+            value=self.hasher.rejected,
+        )
+        yield CounterMetricFamily(
+            'password_hash_wait_seconds',
+            'Time password hashing tasks spent waiting for a worker',
+            value=self.hasher.wait_seconds,
+        )
+        yield CounterMetricFamily(
+            'password_hash_run_seconds',
+            'Time spent hashing and verifying passwords',
+            value=self.hasher.run_seconds,
+        )
+
+
+password_hasher = PasswordHasher(
+    workers=app_settings.password_hash_workers,
+    queue_size=app_settings.password_hash_queue_size,
+)
+REGISTRY.register(PasswordHasherCollector(password_hasher))
+
+
+async def hash_password(password: str) -> str:
     """
     Хеширование пароля
     """
 
-    return pwd_context.hash(password)
+    return await password_hasher.run(pwd_context.hash, password)
 
 
-def verify_password(password: str, hashed_password: str) -> bool:
+async def verify_password(password: str, hashed_password: str) -> bool:
     """
     Проверка пароля
     """
 
-    return pwd_context.verify(password, hashed_password)
+    return await password_hasher.run(
+        pwd_context.verify, password, hashed_password
+    )
 
 
 def create_access_token(
@@ -66,18 +183,68 @@ async def authenticate_user(
     user = await user_crud.get_user_by_login(db=db, login=login)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password(password, user.password):
         return False
 
     return user
 
 
+def token_version_key(user_id: int) -> str:
+    """
+    Ключ версии токенов пользователя
+
+    Токены с версией меньше текущей считаются отозванными
+    """
+
+    return f'token_version:{user_id}'
+
+
+async def get_token_version(cache: Redis, user_id: int) -> int:
+    """
+    Получение текущей версии токенов пользователя
+    """
+
+    return await get_generation(cache, token_version_key(user_id))
+
+
+async def revoke_tokens(cache: Redis, user_id: int) -> None:
+    """
+    Отзыв всех выданных пользователю токенов
+    """
+
+    await bump_generations(cache, token_version_key(user_id))
+
+
+async def get_user(db: AsyncSession, user_id: int) -> User | None:
+    """
+    Получение пользователя по id с кешированием в памяти процесса
+    """
+
+    cache_key = f'user:{user_id}'
+    user = local_cache.get(cache_key)
+    if user is None:
+        user_db = await user_crud.get(db=db, id=user_id)
+        if user_db is None:
+            return None
+        user = User(id=user_db.id, login=user_db.login)
+        local_cache.set(
+            cache_key, user, ttl=app_settings.user_cache_ttl_sec
+        )
+
+    return user
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_session),
+    cache: Redis = Depends(get_redis),
 ) -> User:
     """
     Получение пользователя из токена
+
+    Пользователь и версия токенов берутся из кеша, поэтому обычно
+    запрос обходится без обращения к базе данных. Для токенов,
+    выданных без id пользователя, он ищется по login
     """
 
     credentials_exception = HTTPException(
@@ -96,9 +263,16 @@ async def get_current_user(
     except InvalidTokenError:
         raise credentials_exception
 
-    user = await user_crud.get_user_by_login(db=db, login=login)
+    user_id = payload.get('uid')
+    if user_id is None:
+        user = await user_crud.get_user_by_login(db=db, login=login)
+    else:
+        user = await get_user(db=db, user_id=user_id)
 
-    if user is None:
+    if user is None or user.login != login:
+        raise credentials_exception
+
+    if payload.get('ver', 0) < await get_token_version(cache, user.id):
         raise credentials_exception
 
     return user
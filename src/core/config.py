@@ -1,5 +1,6 @@
 import logging
 from logging import config as logging_config
+from typing import Literal
 
 from pydantic import ConfigDict, IPvAnyAddress
 from pydantic_settings import BaseSettings
@@ -14,6 +15,9 @@ class AppSettings(BaseSettings):
     token_size: int
     secret_key: str
     access_token_expire_seconds: int
+    user_cache_ttl_sec: float = 60
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 64
 
     postgres_user: str
     postgres_password: str
@@ -21,6 +25,10 @@ class AppSettings(BaseSettings):
     db_host: IPvAnyAddress | str
     db_port: int
     postgres_test_db: str
+    postgres_bench_db: str = 'file_storage_bench'
+
+    storage_backend: Literal['minio', 'local'] = 'minio'
+    storage_local_root: str = '/data/files'
 
     minio_root_user: str
     minio_root_password: str
@@ -28,12 +36,46 @@ class AppSettings(BaseSettings):
     mino_port: int
     minio_bucket_name: str
     minio_test_bucket_name: str
+    minio_bench_bucket_name: str = 'file-storage-bench'
     minio_url_expires_sec: int
+    minio_url_expires_margin_sec: int = 10
+    minio_public_url: str | None = None
     minio_part_size_byte: int
+    minio_pool_size: int = 100
+    minio_pool_size_per_host: int = 0
+    minio_keepalive_sec: float = 30
+    minio_delete_concurrency: int = 8
+    upload_chunk_size_byte: int = 1024 * 1024
+    upload_progress_ttl_sec: int = 3600
+    upload_session_ttl_sec: int = 24 * 3600
+    upload_session_reap_interval_sec: int = 600
+    instant_upload_enabled: bool = False
+    instant_upload_proof_size_byte: int = 64 * 1024
+    instant_upload_challenge_ttl_sec: int = 300
+    batch_upload_concurrency: int = 16
+    batch_upload_max_files: int = 10000
+    batch_upload_max_bytes: int = 256 * 1024 * 1024
+    delete_max_files: int = 10000
+    download_redirect: bool = False
+    download_chunk_size_byte: int = 64 * 1024
+    download_max_ranges: int = 16
+    zip_prefetch_files: int = 4
+    zip_prefetch_chunks: int = 16
+    zip_compress_level: int = 6
 
     redis_host: IPvAnyAddress | str
     redis_port: int
     redis_cache_ttl_sec: int
+    redis_bench_db: int = 15
+    local_cache_size: int = 10000
+    local_cache_ttl_sec: float = 5
+    cache_invalidation_channel: str = 'cache_invalidation'
+    cache_stale_ttl_sec: int = 60
+    cache_negative_ttl_sec: int = 5
+    cache_lock_timeout_sec: float = 5
+
+    ping_timeout_sec: float = 2
+    ping_interval_sec: float = 10
 
     model_config = ConfigDict(env_file='.env')
 
@@ -53,6 +95,14 @@ class AppSettings(BaseSettings):
             f'{self.db_port}/{self.postgres_test_db}'
         )
 
+    @property
+    def dsn_bench(self) -> str:
+        return (
+            f'postgresql+asyncpg://{self.postgres_user}:'
+            f'{self.postgres_password}@{self.db_host}:'
+            f'{self.db_port}/{self.postgres_bench_db}'
+        )
+
     @property
     def redis_url(self) -> str:
         return f'redis://{self.redis_host}:{self.redis_port}'
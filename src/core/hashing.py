@@ -0,0 +1,69 @@
+import ctypes
+import hashlib
+
+import _hashlib
+
+# Размер SHA256_CTX из openssl/sha.h: h[8], Nl, Nh, data[16], num, md_len
+SHA256_CTX_SIZE = 112
+SHA256_CHECK = b'abc'
+
+
+def load_libcrypto() -> ctypes.CDLL | None:
+    """
+    Функции SHA-256 из libcrypto, с которой собран hashlib
+
+    None, если функций нет или их результат не совпадает с hashlib
+    """
+
+    try:
+        libcrypto = ctypes.CDLL(_hashlib.__file__)
+        for name in ('SHA256_Init', 'SHA256_Update', 'SHA256_Final'):
+            getattr(libcrypto, name).restype = ctypes.c_int
+    except (OSError, AttributeError):
+        return None
+
+    ctx = ctypes.create_string_buffer(SHA256_CTX_SIZE)
+    digest = ctypes.create_string_buffer(32)
+    libcrypto.SHA256_Init(ctx)
+    libcrypto.SHA256_Update(ctx, SHA256_CHECK, len(SHA256_CHECK))
+    libcrypto.SHA256_Final(digest, ctx)
+    if digest.raw != hashlib.sha256(SHA256_CHECK).digest():
+        return None
+
+    return libcrypto
+
+
+libcrypto = load_libcrypto()
+
+
+class ResumableSha256:
+    """
+    SHA-256, промежуточное состояние которого можно сохранить и продолжить
+    подсчёт в другом процессе
+
+    Объекты hashlib не отдают состояние, поэтому используется SHA256_CTX
+    из libcrypto. Без libcrypto available равно False
+    """
+
+    available = libcrypto is not None
+
+    def __init__(self, state: bytes | None = None) -> None:
+        self._ctx = ctypes.create_string_buffer(SHA256_CTX_SIZE)
+        if state is None:
+            libcrypto.SHA256_Init(self._ctx)
+        elif len(state) == SHA256_CTX_SIZE:
+            ctypes.memmove(self._ctx, state, SHA256_CTX_SIZE)
+        else:
+            raise ValueError(f'Invalid SHA-256 state size: {len(state)}')
+
+    def update(self, data: bytes) -> None:
+        libcrypto.SHA256_Update(self._ctx, data, len(data))
+
+    def state(self) -> bytes:
+        return self._ctx.raw
+
+    def hexdigest(self) -> str:
+        ctx = ctypes.create_string_buffer(self._ctx.raw, SHA256_CTX_SIZE)
+        digest = ctypes.create_string_buffer(32)
+        libcrypto.SHA256_Final(digest, ctx)
+        return digest.raw.hex()
@@ -0,0 +1,114 @@
+import time
+from typing import AsyncIterator, Callable
+
+from prometheus_client import Counter, Gauge, Histogram
+
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request duration until the response body is sent',
+    ('method', 'route', 'status'),
+    buckets=BUCKETS,
+)
+http_requests_in_progress = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being processed',
+    ('method',),
+)
+download_streams_in_progress = Gauge(
+    'download_streams_in_progress',
+    'Streaming downloads in progress',
+    ('kind',),
+)
+minio_request_duration = Histogram(
+    'minio_request_duration_seconds',
+    'MinIO request duration until the response headers are received',
+    ('operation',),
+    buckets=BUCKETS,
+)
+minio_bytes = Counter(
+    'minio_bytes',
+    'Bytes transferred to and from MinIO',
+    ('direction',),
+)
+db_query_duration = Histogram(
+    'db_query_duration_seconds',
+    'Postgres query duration',
+    ('statement',),
+    buckets=BUCKETS,
+)
+cache_requests = Counter(
+    'cache_requests',
+    'Cached metadata lookups by cache level that answered them',
+    ('cache', 'result'),
+)
+
+
+async def track_stream(
+    chunks: AsyncIterator[bytes], kind: str
+) -> AsyncIterator[bytes]:
+    """
+    Учёт потоковой отдачи в download_streams_in_progress
+    """
+
+    with download_streams_in_progress.labels(kind=kind).track_inprogress():
+        async for chunk in chunks:
+            yield chunk
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware для измерения времени обработки запросов
+
+    Время измеряется до отправки последней части тела ответа, поэтому
+    для потоковых ответов учитывается вся передача. Запросы группируются
+    по шаблону пути маршрута
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: dict, receive: Callable, send: Callable
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        in_progress = http_requests_in_progress.labels(method=method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = scope.get('route')
+            http_request_duration.labels(
+                method=method,
+                route=route.path if route else 'unmatched',
+                status=status_code,
+            ).observe(time.perf_counter() - started)
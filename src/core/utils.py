@@ -1,5 +1,8 @@
+import asyncio
 import uuid
 from datetime import UTC, datetime
+from typing import Any, Awaitable, Iterable
+from urllib.parse import quote
 
 
 def aware_utcnow() -> datetime:
@@ -18,6 +21,26 @@ def naive_utcnow() -> datetime:
     return aware_utcnow().replace(tzinfo=None)
 
 
+def content_disposition(filename: str) -> str:
+    """
+    Заголовок Content-Disposition для скачивания файла по RFC 6266
+
+    В filename передаётся ASCII-вариант имени, символы вне ASCII,
+    кавычки и обратная косая черта заменяются на '_'. Если имя
+    изменилось, оно целиком передаётся в filename* в UTF-8
+    """
+
+    fallback = ''.join(
+        char if ' ' <= char < '\x7f' and char not in '"\\' else '_'
+        for char in filename
+    )
+    value = f'attachment; filename="{fallback}"'
+    if fallback != filename:
+        value += f"; filename*=UTF-8''{quote(filename, safe='')}"
+
+    return value
+
+
 def is_uuid(str_to_test, version=4) -> bool:
     """
     Проверка UUID
@@ -29,3 +52,21 @@ def is_uuid(str_to_test, version=4) -> bool:
         return False
 
     return True
+
+
+async def gather_bounded(
+    aws: Iterable[Awaitable[Any]], limit: int, return_exceptions: bool = False
+) -> list[Any]:
+    """
+    Выполнение корутин с ограничением количества одновременно работающих
+    """
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(
+        *(run(aw) for aw in aws), return_exceptions=return_exceptions
+    )
@@ -1,10 +1,15 @@
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
 from src.core.config import app_settings
+from src.core.metrics import db_query_duration
 
 dsn = app_settings.dsn
 engine = create_async_engine(dsn, echo=True, future=True)
@@ -15,6 +20,33 @@ async_session = async_sessionmaker(
 )
 
 
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Измерение времени запросов к postgres
+
+    Запросы группируются по первому слову SQL. Время начала хранится
+    в контексте выполнения: запрос, завершившийся ошибкой, не вызывает
+    after_cursor_execute и ничего не оставляет на соединении
+    """
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        db_query_duration.labels(
+            statement=statement.lstrip().split(None, 1)[0].upper(),
+        ).observe(time.perf_counter() - context.query_started)
+
+
+instrument_engine(engine)
+
+
 async def get_session() -> AsyncSession:
     async with async_session() as session:
         yield session
@@ -7,7 +7,4 @@ redis: Redis = redis.asyncio.from_url(app_settings.redis_url)
 
 
 async def get_redis() -> Redis:
-    try:
-        yield redis
-    finally:
-        await redis.close()
+    yield redis
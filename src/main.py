@@ -1,21 +1,42 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.requests import Request
-from starlette.responses import PlainTextResponse
+from starlette.responses import PlainTextResponse, Response
 
 from src.api.v1.base import api_router
+from src.core.auth import password_hasher
 from src.core.config import app_settings
-from src.services.minio import minio_handler
+from src.core.metrics import MetricsMiddleware
+from src.db.redis import redis
+from src.services.cache import listen_invalidations
+from src.services.ping import service_prober
+from src.services.storage import storage
+from src.services.upload_session import reap_upload_sessions
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await minio_handler.create_backet(app_settings.minio_bucket_name)
+    await storage.start()
+    await storage.create_backet(app_settings.minio_bucket_name)
+    tasks = [
+        asyncio.create_task(listen_invalidations(redis)),
+        asyncio.create_task(reap_upload_sessions(redis)),
+        asyncio.create_task(service_prober.run()),
+    ]
     yield
+    for task in tasks:
+        task.cancel()
+    with suppress(asyncio.CancelledError):
+        await asyncio.gather(*tasks)
+    await storage.close()
+    await redis.aclose()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -26,10 +47,20 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router, prefix='/api/v1')
 exclude_prefixes = ['/api/v1/users/', '/api/openapi', '/api/v1/ping']
 
 
+@app.get('/metrics', include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Метрики процесса в формате Prometheus
+    """
+
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.exception_handler(RequestValidationError)
 async def handle_error(
     request: Request, exc: RequestValidationError
@@ -1,3 +1,5 @@
 from src.models.base import Base  # noqa: F401
 from src.models.user import User  # noqa: F401
 from src.models.file import File  # noqa: F401
+from src.models.blob import Blob  # noqa: F401
+from src.models.folder_usage import FolderUsage  # noqa: F401
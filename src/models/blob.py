@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from src.core.utils import naive_utcnow
+
+from .base import Base
+
+
+class Blob(Base):
+    """
+    Содержимое файла, адресуемое хешем SHA-256
+    """
+
+    __tablename__ = 'blob'
+
+    hash = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, nullable=False, default=naive_utcnow)
@@ -1,12 +1,17 @@
 import uuid
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
+    event,
 )
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -29,11 +34,39 @@ class File(Base):
     name = Column(String, nullable=False)
 
     path = Column(String, nullable=False)
-    size = Column(Integer, nullable=False)
+    extension = Column(
+        String,
+        Computed(r"lower(substring(name from '\.([^.]*)$'))", persisted=True),
+    )
+    size = Column(BigInteger, nullable=False)
+    hash = Column(String(64), ForeignKey('blob.hash'), index=True)
     created_at = Column(
         DateTime, nullable=False, default=naive_utcnow()
     )
+    updated_at = Column(
+        DateTime, nullable=False, default=naive_utcnow, onupdate=naive_utcnow
+    )
 
     __table_args__ = (
         UniqueConstraint('user_id', 'path', 'name', name='_user_path_name_uc'),
+        Index('ix_file_user_id_extension', 'user_id', 'extension'),
+        Index(
+            'ix_file_name_trgm',
+            'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_file_path_trgm',
+            'path',
+            postgresql_using='gin',
+            postgresql_ops={'path': 'gin_trgm_ops'},
+        ),
     )
+
+
+event.listen(
+    File.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'),
+)
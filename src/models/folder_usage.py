@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String
+
+from .base import Base
+
+
+class FolderUsage(Base):
+    """
+    Использование дискового пространства в папке пользователя
+    """
+
+    __tablename__ = 'folder_usage'
+
+    user_id = Column(
+        Integer,
+        ForeignKey('user.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    path = Column(String, primary_key=True)
+    used = Column(BigInteger, nullable=False, default=0)
+    files = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class BlobCreate(BaseModel):
+    hash: str
+    size: int
+
+
+class BlobUpdate(BaseModel):
+    ref_count: int
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class FileBase(BaseModel):
@@ -14,17 +14,62 @@ class FileCreate(BaseModel):
     name: str
     path: str
     size: int
+    hash: Optional[str] = None
 
 
 class FileInDB(FileCreate):
     id: UUID
     created_at: datetime
+    updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
 
-class FileUpdate:
-    pass
+class FileUpdate(BaseModel):
+    size: int
+    hash: Optional[str] = None
+
+
+class UploadPrecheck(BaseModel):
+    path: str
+    size: int = Field(ge=0)
+    hash: str = Field(pattern='^[0-9a-f]{64}$')
+    challenge: Optional[str] = None
+    proof: Optional[str] = Field(None, pattern='^[0-9a-f]{64}$')
+
+
+class UploadChallenge(BaseModel):
+    id: str
+    offset: int
+    length: int
+
+
+class UploadPrecheckResult(BaseModel):
+    exists: bool
+    file: Optional[FileInDB] = None
+    challenge: Optional[UploadChallenge] = None
+
+
+class BatchUploadResult(BaseModel):
+    path: str
+    file: Optional[FileInDB] = None
+    error: Optional[str] = None
+
+
+class FilesDelete(BaseModel):
+    ids: list[UUID] = []
+    paths: list[str] = []
+
+
+class FilesDeleted(BaseModel):
+    files: int
+    size: int
+
+
+class UploadProgress(BaseModel):
+    path: str
+    received: int
+    total: Optional[int] = None
 
 
 class SearchOptions(BaseModel):
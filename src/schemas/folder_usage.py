@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class FolderUsageCreate(BaseModel):
+    user_id: int
+    path: str
+    used: int
+    files: int
+
+
+class FolderUsageUpdate(BaseModel):
+    used: int
+    files: int
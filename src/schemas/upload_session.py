@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreate(BaseModel):
+    path: str
+    size: int = Field(gt=0)
+
+
+class UploadSession(BaseModel):
+    id: str
+    path: str
+    size: int
+    chunk_size: int
+    chunks: int
+    received: list[int] = []
+
+
+class UploadSessionState(UploadSession):
+    user_id: int
+    upload_id: str
+    object_name: str
+    hashed_chunks: int = 0
+    hash_state: Optional[str] = None
@@ -0,0 +1,333 @@
+import asyncio
+import struct
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from src.core.config import app_settings
+from src.core.metrics import track_stream
+from src.core.utils import content_disposition
+from src.schemas.file import FileInDB
+from src.services.file import file_object_name
+from src.services.storage import storage
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_VERSION = 45
+ZIP_FLAGS = 0x0808
+ZIP_MAX_32 = 0xFFFFFFFF
+ZIP_MAX_16 = 0xFFFF
+ZIP_EXTERNAL_ATTR = 0o100644 << 16
+ZIP_METHODS = {'stored': ZIP_STORED, 'deflate': ZIP_DEFLATED}
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+ZIP64_LOCAL_EXTRA = struct.Struct('<HHQQ')
+DATA_DESCRIPTOR = struct.Struct('<IIQQ')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+ZIP64_CENTRAL_EXTRA = struct.Struct('<HHQQQ')
+ZIP64_END = struct.Struct('<IQHHIIQQQQ')
+ZIP64_LOCATOR = struct.Struct('<IIQI')
+END = struct.Struct('<IHHHHIIH')
+
+
+def dos_datetime(value: datetime) -> tuple[int, int]:
+    """
+    Дата и время в формате MS-DOS
+    """
+
+    if value.year < 1980:
+        return 0, (1 << 5) | 1
+
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+
+    return time, date
+
+
+def local_header(name: bytes, method: int, created_at: datetime) -> bytes:
+    """
+    Локальный заголовок записи
+
+    Размеры и CRC неизвестны до конца записи и передаются
+    в дескрипторе данных после содержимого
+    """
+
+    time, date = dos_datetime(created_at)
+    extra = ZIP64_LOCAL_EXTRA.pack(0x0001, 16, 0, 0)
+    header = LOCAL_HEADER.pack(
+        0x04034B50,
+        ZIP_VERSION,
+        ZIP_FLAGS,
+        method,
+        time,
+        date,
+        0,
+        ZIP_MAX_32,
+        ZIP_MAX_32,
+        len(name),
+        len(extra),
+    )
+
+    return header + name + extra
+
+
+def data_descriptor(crc: int, compressed_size: int, size: int) -> bytes:
+    """
+    Дескриптор данных записи с размерами Zip64
+    """
+
+    return DATA_DESCRIPTOR.pack(0x08074B50, crc, compressed_size, size)
+
+
+def central_header(
+    name: bytes,
+    method: int,
+    created_at: datetime,
+    crc: int,
+    compressed_size: int,
+    size: int,
+    offset: int,
+) -> bytes:
+    """
+    Запись центрального каталога
+    """
+
+    time, date = dos_datetime(created_at)
+    extra = ZIP64_CENTRAL_EXTRA.pack(0x0001, 24, size, compressed_size, offset)
+    header = CENTRAL_HEADER.pack(
+        0x02014B50,
+        (3 << 8) | ZIP_VERSION,
+        ZIP_VERSION,
+        ZIP_FLAGS,
+        method,
+        time,
+        date,
+        crc,
+        ZIP_MAX_32,
+        ZIP_MAX_32,
+        len(name),
+        len(extra),
+        0,
+        0,
+        0,
+        ZIP_EXTERNAL_ATTR,
+        ZIP_MAX_32,
+    )
+
+    return header + name + extra
+
+
+def end_of_archive(entries: int, cd_size: int, cd_offset: int) -> bytes:
+    """
+    Конец центрального каталога Zip64 и обычная запись конца архива
+    """
+
+    zip64_end_offset = cd_offset + cd_size
+    zip64_end = ZIP64_END.pack(
+        0x06064B50,
+        ZIP64_END.size - 12,
+        (3 << 8) | ZIP_VERSION,
+        ZIP_VERSION,
+        0,
+        0,
+        entries,
+        entries,
+        cd_size,
+        cd_offset,
+    )
+    locator = ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_end_offset, 1)
+    end = END.pack(
+        0x06054B50,
+        0,
+        0,
+        ZIP_MAX_16,
+        ZIP_MAX_16,
+        ZIP_MAX_32,
+        ZIP_MAX_32,
+        0,
+    )
+
+    return zip64_end + locator + end
+
+
+def archive_size(names: list[bytes], files: list[FileInDB]) -> int:
+    """
+    Размер архива без сжатия
+    """
+
+    entries = sum(
+        LOCAL_HEADER.size
+        + ZIP64_LOCAL_EXTRA.size
+        + DATA_DESCRIPTOR.size
+        + CENTRAL_HEADER.size
+        + ZIP64_CENTRAL_EXTRA.size
+        + 2 * len(name)
+        + file.size
+        for name, file in zip(names, files)
+    )
+
+    return entries + ZIP64_END.size + ZIP64_LOCATOR.size + END.size
+
+
+async def prefetch_file(file: FileInDB, queue: asyncio.Queue) -> None:
+    """
+    Чтение содержимого файла в ограниченную очередь
+
+    Конец файла обозначается None, ошибка чтения передаётся в очередь
+    """
+
+    try:
+        chunks = await storage.read_stream(file_object_name(file))
+        async for chunk in chunks:
+            await queue.put(chunk)
+    except Exception as e:
+        await queue.put(e)
+    else:
+        await queue.put(None)
+
+
+async def iter_prefetched(
+    files: list[FileInDB],
+) -> AsyncIterator[AsyncIterator[bytes]]:
+    """
+    Содержимое файлов по порядку с параллельным чтением следующих
+
+    Одновременно читается не больше zip_prefetch_files файлов,
+    для каждого буферизуется не больше zip_prefetch_chunks частей
+    """
+
+    pending = deque()
+    next_file = iter(files)
+
+    def start_next() -> None:
+        file = next(next_file, None)
+        if file is not None:
+            queue = asyncio.Queue(maxsize=app_settings.zip_prefetch_chunks)
+            task = asyncio.create_task(prefetch_file(file, queue))
+            pending.append((queue, task))
+
+    async def iter_queue(queue: asyncio.Queue) -> AsyncIterator[bytes]:
+        while (chunk := await queue.get()) is not None:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    try:
+        for _ in range(max(app_settings.zip_prefetch_files, 1)):
+            start_next()
+        while pending:
+            queue, task = pending[0]
+            yield iter_queue(queue)
+            await task
+            pending.popleft()
+            start_next()
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+async def iter_zip(
+    names: list[bytes], files: list[FileInDB], method: int
+) -> AsyncIterator[bytes]:
+    """
+    Потоковое формирование ZIP-архива с Zip64
+    """
+
+    contents = iter_prefetched(files)
+    try:
+        async for chunk in iter_entries(names, files, method, contents):
+            yield chunk
+    finally:
+        await contents.aclose()
+
+
+async def iter_entries(
+    names: list[bytes],
+    files: list[FileInDB],
+    method: int,
+    contents: AsyncIterator[AsyncIterator[bytes]],
+) -> AsyncIterator[bytes]:
+    """
+    Записи архива и центральный каталог
+    """
+
+    offset = 0
+    central_directory = []
+    for name, file in zip(names, files):
+        content = await anext(contents)
+        header = local_header(name, method, file.created_at)
+        yield header
+
+        crc = 0
+        size = compressed_size = 0
+        compressor = None
+        if method == ZIP_DEFLATED:
+            compressor = zlib.compressobj(
+                app_settings.zip_compress_level, zlib.DEFLATED, -15
+            )
+        async for chunk in content:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if compressor:
+                chunk = compressor.compress(chunk)
+            compressed_size += len(chunk)
+            if chunk:
+                yield chunk
+        if compressor:
+            chunk = compressor.flush()
+            compressed_size += len(chunk)
+            yield chunk
+
+        yield data_descriptor(crc, compressed_size, size)
+        central_directory.append(
+            central_header(
+                name,
+                method,
+                file.created_at,
+                crc,
+                compressed_size,
+                size,
+                offset,
+            )
+        )
+        offset += len(header) + compressed_size + DATA_DESCRIPTOR.size
+
+    cd = b''.join(central_directory)
+    yield cd
+    yield end_of_archive(len(files), len(cd), offset)
+
+
+def archive_name(folder: str) -> str:
+    """
+    Имя архива по имени папки
+    """
+
+    return f'{folder.rstrip("/").rpartition("/")[2] or "files"}.zip'
+
+
+def build_archive_response(
+    folder: str, files: list[FileInDB], compression: str
+) -> StreamingResponse:
+    """
+    Формирование ответа с ZIP-архивом файлов папки
+
+    Имена в архиве задаются относительно папки. Размер архива без сжатия
+    известен заранее и передаётся в Content-Length
+    """
+
+    method = ZIP_METHODS[compression]
+    names = [(file.path[len(folder) :] + file.name).encode() for file in files]
+    headers = {
+        'Content-Disposition': content_disposition(archive_name(folder)),
+    }
+    if method == ZIP_STORED:
+        headers['Content-Length'] = str(archive_size(names, files))
+
+    return StreamingResponse(
+        track_stream(iter_zip(names, files, method), 'archive'),
+        media_type='application/zip',
+        headers=headers,
+    )
@@ -0,0 +1,225 @@
+from collections import Counter
+from typing import Any, AsyncIterator, Iterable
+from uuid import uuid4
+
+from sqlalchemy import Integer, String, column, delete, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import logger
+from src.models.blob import Blob as BlobModel
+from src.schemas.blob import BlobCreate, BlobUpdate
+from src.services.storage import STORAGE_ERRORS, storage
+
+from .base import RepositoryDB
+
+RELEASE_BATCH_SIZE = 5000
+
+
+class RepositoryBlob(RepositoryDB[BlobModel, BlobCreate, BlobUpdate]):
+    async def acquire(self, db: AsyncSession, hash: str, size: int) -> bool:
+        """
+        Добавление ссылки на блоб
+
+        Возвращает True, если блоб с таким хешем появился впервые
+        или на него не было ссылок, и объект нужно записать заново.
+        Строка блоба остаётся заблокированной до конца транзакции
+        """
+
+        stmt = (
+            insert(self._model)
+            .values(hash=hash, size=size, ref_count=1)
+            .on_conflict_do_update(
+                index_elements=[self._model.hash],
+                set_={'ref_count': self._model.ref_count + 1},
+            )
+            .returning(self._model.ref_count)
+        )
+        results = await db.execute(statement=stmt)
+        return results.scalar_one() == 1
+
+    async def acquire_many(
+        self, db: AsyncSession, sizes: dict[str, int], counts: Counter
+    ) -> set[str]:
+        """
+        Добавление нескольких ссылок на блобы одним запросом
+
+        counts - количество новых ссылок на каждый хеш.
+        Возвращает хеши блобов, которые появились впервые
+        """
+
+        if not counts:
+            return set()
+
+        stmt = insert(self._model).values(
+            [
+                {'hash': hash, 'size': sizes[hash], 'ref_count': count}
+                for hash, count in sorted(counts.items())
+            ]
+        )
+        ref_count = self._model.ref_count + stmt.excluded.ref_count
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self._model.hash], set_={'ref_count': ref_count}
+        ).returning(self._model.hash, self._model.ref_count)
+        results = await db.execute(statement=stmt)
+
+        return {
+            hash
+            for hash, ref_count in results.all()
+            if ref_count == counts[hash]
+        }
+
+    async def acquire_existing(
+        self, db: AsyncSession, hash: str, size: int
+    ) -> bool:
+        """
+        Добавление ссылки на уже сохранённый блоб
+
+        Возвращает False, если блоба с таким хешем и размером нет.
+        Блобы без ссылок не учитываются, их объекты могут быть удалены
+        """
+
+        stmt = (
+            update(self._model)
+            .where(
+                self._model.hash == hash,
+                self._model.size == size,
+                self._model.ref_count > 0,
+            )
+            .values(ref_count=self._model.ref_count + 1)
+            .returning(self._model.hash)
+        )
+        results = await db.execute(statement=stmt)
+        return results.scalar_one_or_none() is not None
+
+    async def release(
+        self, db: AsyncSession, hashes: Iterable[str]
+    ) -> list[str]:
+        """
+        Удаление ссылок на блобы
+
+        Возвращает хеши блобов, на которые больше не ссылается ни один файл.
+        Записи таких блобов остаются до вызова delete_unreferenced
+        """
+
+        counts = list(Counter(hashes).items())
+        unreferenced = []
+        for i in range(0, len(counts), RELEASE_BATCH_SIZE):
+            released = values(
+                column('hash', String),
+                column('count', Integer),
+                name='released',
+            ).data(counts[i : i + RELEASE_BATCH_SIZE])
+            stmt = (
+                update(self._model)
+                .where(self._model.hash == released.c.hash)
+                .values(ref_count=self._model.ref_count - released.c.count)
+                .returning(self._model.hash, self._model.ref_count)
+            )
+            results = await db.execute(statement=stmt)
+            unreferenced.extend(
+                hash for hash, ref_count in results.all() if ref_count <= 0
+            )
+
+        return unreferenced
+
+    async def delete_unreferenced(
+        self, db: AsyncSession, hashes: list[str]
+    ) -> list[str]:
+        """
+        Удаление записей блобов, на которые по-прежнему нет ссылок
+
+        Возвращает хеши удалённых записей
+        """
+
+        stmt = (
+            delete(self._model)
+            .where(self._model.hash.in_(hashes), self._model.ref_count <= 0)
+            .returning(self._model.hash)
+        )
+        results = await db.execute(statement=stmt)
+        return list(results.scalars().all())
+
+
+blob_crud = RepositoryBlob(BlobModel)
+
+
+def blob_object_name(hash: str) -> str:
+    """
+    Имя объекта блоба в хранилище
+    """
+
+    return f'blobs/{hash}'
+
+
+def staging_object_name() -> str:
+    """
+    Имя временного объекта для загрузки
+    """
+
+    return f'uploads/{uuid4()}'
+
+
+async def hash_chunks(
+    chunks: AsyncIterator[bytes], content_hash: Any
+) -> AsyncIterator[bytes]:
+    """
+    Подсчёт хеша содержимого при потоковой передаче
+    """
+
+    async for chunk in chunks:
+        content_hash.update(chunk)
+        yield chunk
+
+
+async def store_blob(
+    db: AsyncSession, hash: str, size: int, staging_name: str
+) -> None:
+    """
+    Сохранение загруженного содержимого как блоба
+
+    Новое содержимое копируется из временного объекта в хранилище,
+    для уже существующего увеличивается только счётчик ссылок
+    """
+
+    if await blob_crud.acquire(db, hash, size):
+        await storage.copy(staging_name, blob_object_name(hash), size)
+
+
+async def release_blobs(
+    db: AsyncSession, hashes: Iterable[str]
+) -> list[str]:
+    """
+    Освобождение ссылок на блобы
+
+    Возвращает хеши блобов без ссылок, их нужно передать в purge_blobs
+    после фиксации транзакции
+    """
+
+    return await blob_crud.release(db, hashes)
+
+
+async def purge_blobs(db: AsyncSession, hashes: list[str]) -> None:
+    """
+    Удаление блобов без ссылок вместе с объектами
+
+    Вызывается после фиксации транзакции, в которой освобождены ссылки.
+    Объекты удаляются, пока строки блобов заблокированы удалением,
+    поэтому параллельная загрузка того же содержимого дождётся фиксации
+    и запишет объект заново. Если удаление не зафиксировано, строка
+    остаётся без ссылок, и acquire тоже запишет объект заново
+    """
+
+    if not hashes:
+        return
+
+    try:
+        deleted = await blob_crud.delete_unreferenced(db, hashes)
+        if deleted:
+            await storage.remove([blob_object_name(hash) for hash in deleted])
+    except STORAGE_ERRORS as e:
+        await db.rollback()
+        logger.warning(f'Failed to remove unreferenced blobs: {e}')
+        return
+
+    await db.commit()
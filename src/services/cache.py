@@ -0,0 +1,301 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from prometheus_client import Gauge
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+
+from src.core.config import app_settings, logger
+
+LOCK_POLL_INTERVAL_SEC = 0.05
+NOT_FOUND = object()
+NOT_FOUND_VALUE = b''
+
+
+class LocalCache:
+    """
+    Ограниченный по размеру кеш в памяти процесса с вытеснением LRU
+    и временем жизни записей
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any | None:
+        """
+        Получение значения, если оно есть и не устарело
+        """
+
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """
+        Сохранение значения с вытеснением давно не использованных
+        """
+
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        """
+        Удаление значений
+        """
+
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Очистка кеша
+        """
+
+        self._data.clear()
+
+
+local_cache = LocalCache(
+    maxsize=app_settings.local_cache_size,
+    ttl=app_settings.local_cache_ttl_sec,
+)
+Gauge(
+    'local_cache_entries',
+    'Entries in the in-process cache',
+).set_function(lambda: len(local_cache))
+
+
+async def get_generation(cache: Redis, key: str) -> int:
+    """
+    Получение поколения кешированных данных
+
+    Поколение входит в ключи кеша, поэтому его увеличение делает
+    недоступными все ранее сохранённые записи
+    """
+
+    generation = local_cache.get(key)
+    if generation is None:
+        generation = int(await cache.get(key) or 0)
+        local_cache.set(key, generation)
+
+    return generation
+
+
+async def bump_generations(cache: Redis, *keys: str) -> None:
+    """
+    Увеличение поколений в Redis и их удаление из локальных кешей
+    всех процессов
+
+    Остальные процессы получают список ключей через pub/sub
+    """
+
+    if not keys:
+        return
+
+    local_cache.delete(*keys)
+    async with cache.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.incr(key)
+        pipe.publish(app_settings.cache_invalidation_channel, json.dumps(keys))
+        await pipe.execute()
+
+
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+async def single_flight(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Объединение одновременных загрузок одного ключа в процессе
+
+    Загрузку выполняет первый запрос, остальные ждут его результат.
+    Если первый запрос отменён, ожидающие выполняют загрузку сами
+    """
+
+    future = _in_flight.get(key)
+    if future is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            return await load()
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await load()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _in_flight[key]
+
+
+async def read_entry(cache: Redis, key: str) -> tuple[bytes | None, bool]:
+    """
+    Получение записи из Redis и признака её устаревания
+
+    Записи хранятся дольше своего срока на время
+    cache_stale_ttl_sec, в течение которого они считаются устаревшими
+    """
+
+    async with cache.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.pttl(key)
+        value, pttl = await pipe.execute()
+
+    return value, pttl < app_settings.cache_stale_ttl_sec * 1000
+
+
+async def write_entry(cache: Redis, key: str, value: bytes | str) -> None:
+    """
+    Сохранение записи в Redis с запасом времени на устаревание
+    """
+
+    await cache.set(
+        key,
+        value,
+        ex=app_settings.redis_cache_ttl_sec + app_settings.cache_stale_ttl_sec,
+    )
+
+
+async def wait_for_entry(
+    cache: Redis, key: str, lock_key: str
+) -> bytes | None:
+    """
+    Ожидание записи, которую загружает другой процесс
+
+    Ожидание прекращается, когда блокировка снята или истекла
+    """
+
+    deadline = time.monotonic() + app_settings.cache_lock_timeout_sec
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL_SEC)
+        async with cache.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.exists(lock_key)
+            value, locked = await pipe.execute()
+        if value is not None or not locked:
+            return value
+
+    return None
+
+
+async def release_lock(cache: Redis, key: str, token: str) -> None:
+    """
+    Снятие блокировки, если она ещё принадлежит этому запросу
+    """
+
+    async with cache.pipeline(transaction=True) as pipe:
+        try:
+            await pipe.watch(key)
+            if await pipe.get(key) == token.encode():
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+        except WatchError:
+            pass
+
+
+async def load_entry(
+    cache: Redis,
+    key: str,
+    load: Callable[[], Awaitable[Any]],
+    dumps: Callable[[Any], bytes | str],
+    loads: Callable[[bytes], Any],
+) -> Any:
+    """
+    Получение значения из Redis или его загрузка с блокировкой
+
+    Загрузку выполняет один процесс, получивший блокировку. Остальные
+    отдают устаревшее значение, а если его нет - ждут записи.
+    Отсутствие значения кешируется на cache_negative_ttl_sec
+    """
+
+    value, stale = await read_entry(cache, key)
+    if value == NOT_FOUND_VALUE:
+        return None
+    if value is not None and not stale:
+        return loads(value)
+
+    lock_key = f'lock:{key}'
+    token = uuid4().hex
+    locked = await cache.set(
+        lock_key,
+        token,
+        nx=True,
+        px=int(app_settings.cache_lock_timeout_sec * 1000),
+    )
+    if not locked:
+        if value is None:
+            value = await wait_for_entry(cache, key, lock_key)
+        if value == NOT_FOUND_VALUE:
+            return None
+        if value is not None:
+            return loads(value)
+
+    try:
+        result = await load()
+        if result:
+            await write_entry(cache, key, dumps(result))
+        elif app_settings.cache_negative_ttl_sec > 0:
+            await cache.set(
+                key, NOT_FOUND_VALUE, ex=app_settings.cache_negative_ttl_sec
+            )
+    finally:
+        if locked:
+            await release_lock(cache, lock_key, token)
+
+    return result
+
+
+async def listen_invalidations(cache: Redis) -> None:
+    """
+    Удаление из локального кеша ключей, инвалидированных другими процессами
+
+    Пока подписка не работает, сообщения могут теряться,
+    поэтому после переподключения локальный кеш очищается
+    """
+
+    while True:
+        pubsub = cache.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(app_settings.cache_invalidation_channel)
+            local_cache.clear()
+            async for message in pubsub.listen():
+                local_cache.delete(*json.loads(message['data']))
+        except (RedisError, OSError) as e:
+            logger.warning(f'Cache invalidation listener failed: {e}')
+            local_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,330 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator
+from uuid import uuid4
+
+from fastapi import status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from src.core.config import app_settings
+from src.core.metrics import track_stream
+from src.core.utils import content_disposition
+from src.schemas.file import FileInDB
+from src.services.file import file_object_name
+from src.services.storage import storage
+
+Ranges = list[tuple[int, int]]
+CACHE_CONTROL = 'private, no-cache'
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Запрошенные диапазоны не пересекаются с содержимым файла
+    """
+
+
+def parse_range_spec(spec: str, size: int) -> tuple[int, int] | None:
+    """
+    Разбор одного диапазона из заголовка Range
+
+    Возвращает None для диапазона за пределами файла,
+    для некорректного диапазона поднимает ValueError
+    """
+
+    start_str, sep, end_str = (part.strip() for part in spec.partition('-'))
+    if not sep or not (start_str or end_str):
+        raise ValueError(f'Invalid range: {spec}')
+    if not all(part.isdigit() for part in (start_str, end_str) if part):
+        raise ValueError(f'Invalid range: {spec}')
+
+    if not start_str:
+        suffix_length = int(end_str)
+        if suffix_length == 0:
+            return None
+        start, end = max(size - suffix_length, 0), size - 1
+    else:
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+        if end_str and end < start:
+            raise ValueError(f'Invalid range: {spec}')
+
+    if start >= size:
+        return None
+
+    return start, min(end, size - 1)
+
+
+def parse_range(range_header: str, size: int) -> Ranges | None:
+    """
+    Разбор заголовка Range
+
+    Возвращает список диапазонов (начало, конец включительно) или None,
+    если заголовок некорректен и должен быть проигнорирован
+    """
+
+    unit, _, ranges_spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or not ranges_spec.strip():
+        return None
+
+    try:
+        ranges = [
+            byte_range
+            for spec in ranges_spec.split(',')
+            if (byte_range := parse_range_spec(spec, size)) is not None
+        ]
+    except ValueError:
+        return None
+
+    if len(ranges) > app_settings.download_max_ranges:
+        return None
+
+    if not ranges:
+        raise RangeNotSatisfiable
+
+    return ranges
+
+
+def file_etag(file: FileInDB) -> str:
+    """
+    Строгий ETag содержимого файла
+
+    Для файлов с блобом это хеш содержимого. Файлы без хеша загружены
+    до появления блобов и не перезаписывались, поэтому для них
+    используется id
+    """
+
+    return f'"{file.hash or file.id}"'
+
+
+def http_date(value: datetime) -> str:
+    """
+    Дата в формате заголовков HTTP
+    """
+
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: str) -> datetime | None:
+    """
+    Разбор даты из заголовка HTTP
+    """
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        return date
+
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Проверка условия If-None-Match
+
+    Сравнение ETag слабое, как требует RFC 9110
+    """
+
+    if if_none_match.strip() == '*':
+        return True
+
+    return any(
+        tag.strip().removeprefix('W/') == etag.removeprefix('W/')
+        for tag in if_none_match.split(',')
+    )
+
+
+def not_modified(
+    etag: str,
+    last_modified: datetime | None,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    """
+    Проверка, что у клиента актуальная версия ответа
+
+    If-Modified-Since учитывается, только если нет If-None-Match
+    """
+
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+
+    if not if_modified_since or last_modified is None:
+        return False
+
+    date = parse_http_date(if_modified_since)
+    return date is not None and last_modified.replace(microsecond=0) <= date
+
+
+def not_modified_response(headers: dict[str, str]) -> Response:
+    """
+    Ответ 304 с заголовками валидаторов
+    """
+
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={'Cache-Control': CACHE_CONTROL, **headers},
+    )
+
+
+def file_validators(file: FileInDB) -> dict[str, str]:
+    """
+    Заголовки ETag и Last-Modified файла
+    """
+
+    return {
+        'ETag': file_etag(file),
+        'Last-Modified': http_date(file.updated_at),
+    }
+
+
+def if_range_matches(
+    if_range: str, etag: str, last_modified: datetime | None
+) -> bool:
+    """
+    Проверка условия If-Range
+
+    Сравнение ETag строгое, дата должна совпадать с датой изменения файла
+    """
+
+    if_range = if_range.strip()
+    if if_range.startswith(('"', 'W/')):
+        return not if_range.startswith('W/') and if_range == etag
+
+    date = parse_http_date(if_range)
+    if date is None or last_modified is None:
+        return False
+
+    return last_modified.replace(microsecond=0) == date
+
+
+def resolve_ranges(
+    file: FileInDB, range_header: str | None, if_range: str | None
+) -> Ranges | None:
+    """
+    Получение диапазонов, которые нужно отдать клиенту
+    """
+
+    if not range_header:
+        return None
+
+    if if_range and not if_range_matches(
+        if_range, file_etag(file), file.updated_at
+    ):
+        return None
+
+    return parse_range(range_header, file.size)
+
+
+def byteranges_delimiters(
+    ranges: Ranges, size: int, boundary: str
+) -> tuple[list[bytes], bytes]:
+    """
+    Заголовки частей и завершающий разделитель multipart/byteranges
+    """
+
+    headers = [
+        (
+            ('\r\n' if i else '')
+            + f'--{boundary}\r\n'
+            + 'Content-Type: application/octet-stream\r\n'
+            + f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+        ).encode()
+        for i, (start, end) in enumerate(ranges)
+    ]
+    closing = f'\r\n--{boundary}--\r\n'.encode()
+
+    return headers, closing
+
+
+async def iter_byteranges(
+    file: FileInDB, ranges: Ranges, headers: list[bytes], closing: bytes
+) -> AsyncIterator[bytes]:
+    """
+    Потоковая отдача нескольких диапазонов файла
+    """
+
+    for part_header, (start, end) in zip(headers, ranges):
+        yield part_header
+        chunks = await storage.read_stream(
+            file_object_name(file), offset=start, length=end - start + 1
+        )
+        async for chunk in chunks:
+            yield chunk
+
+    yield closing
+
+
+async def build_download_response(
+    file: FileInDB, ranges: Ranges | None
+) -> Response:
+    """
+    Формирование ответа со всем файлом или с запрошенными диапазонами
+
+    Файл целиком из локального хранилища отдаётся FileResponse с диска
+    без обращения к хранилищу. Uvicorn не поддерживает расширение
+    http.response.pathsend, поэтому Starlette читает файл частями
+    в потоке: передача идёт через Python, без sendfile
+    """
+
+    headers = {
+        'Content-Disposition': content_disposition(file.name),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': CACHE_CONTROL,
+        **file_validators(file),
+    }
+
+    if ranges and len(ranges) > 1:
+        boundary = uuid4().hex
+        part_headers, closing = byteranges_delimiters(
+            ranges, file.size, boundary
+        )
+        content_length = (
+            sum(len(part_header) for part_header in part_headers)
+            + sum(end - start + 1 for start, end in ranges)
+            + len(closing)
+        )
+        headers['Content-Length'] = str(content_length)
+        return StreamingResponse(
+            track_stream(
+                iter_byteranges(file, ranges, part_headers, closing),
+                'byteranges',
+            ),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=f'multipart/byteranges; boundary={boundary}',
+            headers=headers,
+        )
+
+    status_code = status.HTTP_200_OK
+    offset = length = 0
+    if ranges:
+        start, end = ranges[0]
+        offset, length = start, end - start + 1
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers['Content-Range'] = f'bytes {start}-{end}/{file.size}'
+
+    object_name = file_object_name(file)
+    path = storage.local_path(object_name)
+    if path is not None and not ranges:
+        return FileResponse(
+            path,
+            headers=headers,
+            media_type='application/octet-stream',
+            stat_result=await asyncio.to_thread(os.stat, path),
+        )
+
+    chunks = await storage.read_stream(
+        object_name, offset=offset, length=length
+    )
+    headers['Content-Length'] = str(length or file.size)
+
+    return StreamingResponse(
+        track_stream(chunks, 'file'),
+        status_code=status_code,
+        media_type='application/octet-stream',
+        headers=headers,
+    )
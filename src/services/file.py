@@ -1,22 +1,96 @@
+import base64
+import binascii
+import hashlib
+import hmac
 import json
+import secrets
+from collections import Counter
 from functools import wraps
 from pathlib import Path
-from typing import Any, Callable
-from uuid import UUID
+from typing import Any, AsyncIterator, Callable, Iterable
+from uuid import UUID, uuid4
 
 from fastapi import UploadFile
 from redis import Redis
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, delete, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.config import app_settings
+from src.core.config import app_settings, logger
+from src.core.metrics import cache_requests
+from src.core.utils import gather_bounded, naive_utcnow
 from src.models.file import File as FileModel
-from src.schemas.file import FileCreate, FileInDB, FileUpdate, SearchOptions
+from src.schemas.file import (
+    BatchUploadResult,
+    FileCreate,
+    FilesDeleted,
+    FileInDB,
+    FileUpdate,
+    SearchOptions,
+    UploadChallenge,
+    UploadProgress,
+)
 from src.schemas.user import Status
+from src.services.blob import (
+    blob_crud,
+    blob_object_name,
+    purge_blobs,
+    release_blobs,
+    store_blob,
+)
+from src.services.cache import (
+    NOT_FOUND,
+    bump_generations,
+    get_generation,
+    load_entry,
+    local_cache,
+    single_flight,
+)
+from src.services.folder_usage import folder_usage_crud
+from src.services.storage import STORAGE_ERRORS, storage
 
 from .base import ModelType, RepositoryDB
 
 
+def user_generation_key(user_id: int) -> str:
+    """
+    Ключ поколения кешированных файлов пользователя
+    """
+
+    return f'generation:{user_id}'
+
+
+def folder_generation_key(user_id: int, path: str) -> str:
+    """
+    Ключ поколения кешированных файлов папки пользователя
+    """
+
+    return f'generation:{user_id}:{path}'
+
+
+async def get_listing_etag(
+    cache: Redis, user_id: int, path: str | None, *params: Any
+) -> str:
+    """
+    ETag списка файлов пользователя или папки
+
+    Список меняется только вместе с поколением пользователя или папки,
+    поэтому ETag строится из поколения и параметров запроса
+    """
+
+    key = (
+        user_generation_key(user_id)
+        if path is None
+        else folder_generation_key(user_id, path)
+    )
+    generation = await get_generation(cache, key)
+    digest = hashlib.sha256(
+        json.dumps([key, generation, *params]).encode()
+    ).hexdigest()
+
+    return f'"{digest[:32]}"'
+
+
 class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
     async def get_multi_for_user(
         self,
@@ -25,14 +99,22 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
         user_id: int,
         offset: int,
         limit: int,
+        cursor: tuple[str, str] | None = None,
     ) -> list[ModelType]:
         """
         Получение списка файлов пользователя
+
+        Файлы упорядочены по пути и имени, курсор - путь и имя
+        последнего файла предыдущей страницы
         """
 
+        stmt = select(self._model).where(self._model.user_id == user_id)
+        if cursor:
+            stmt = stmt.where(
+                tuple_(self._model.path, self._model.name) > tuple_(*cursor)
+            )
         stmt = (
-            select(self._model)
-            .where(self._model.user_id == user_id)  # noqa: E712
+            stmt.order_by(self._model.path, self._model.name)
             .offset(offset)
             .limit(limit)
         )
@@ -47,42 +129,100 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
         user_id: int,
         offset: int,
         limit: int,
+        cursor: tuple[str, str] | None = None,
     ) -> list[ModelType]:
         """
         Получение списка файлов из указанной папки
+
+        Файлы упорядочены по имени, курсор - путь и имя
+        последнего файла предыдущей страницы
+        """
+
+        stmt = select(self._model).where(
+            self._model.user_id == user_id, self._model.path == path
+        )
+        if cursor:
+            stmt = stmt.where(self._model.name > cursor[1])
+        stmt = stmt.order_by(self._model.name).offset(offset).limit(limit)
+        results = await db.execute(statement=stmt)
+        return results.scalars().all()
+
+    async def get_all_in_folder(
+        self, db: AsyncSession, user_id: int, path: str
+    ) -> list[ModelType]:
+        """
+        Получение всех файлов пользователя из папки и её подпапок
+
+        Файлы упорядочены по пути и имени
         """
 
         stmt = (
             select(self._model)
             .where(
-                self._model.user_id == user_id, self._model.path == path
-            )  # noqa: E712
-            .offset(offset)
-            .limit(limit)
+                self._model.user_id == user_id,
+                self._model.path.startswith(path, autoescape=True),
+            )
+            .order_by(self._model.path, self._model.name)
         )
         results = await db.execute(statement=stmt)
         return results.scalars().all()
 
     @staticmethod
-    def cache_result(cache_key_prefix: str, key_fields: list[str]) -> Callable:
+    def cache_result(
+        cache_key_prefix: str,
+        key_fields: list[str],
+        generation_key: Callable[..., str],
+        generation_fields: list[str],
+    ) -> Callable:
         def decorator(func: Callable) -> Callable:
             @wraps(func)
             async def wrapper(*args, **kwargs) -> Any:
-                key_parts = [str(kwargs[key]) for key in key_fields]
-                cache_key = cache_key_prefix + ':' + ':'.join(key_parts)
                 cache = kwargs['cache']
-                cached_result = await cache.get(cache_key)
-                if cached_result:
-                    file = FileInDB(**json.loads(cached_result))
-                    return file
+                generation_args = [kwargs[key] for key in generation_fields]
+                generation = await get_generation(
+                    cache, generation_key(*generation_args)
+                )
+                key_parts = [str(kwargs[key]) for key in key_fields]
+                cache_key = (
+                    f'{cache_key_prefix}:{generation}:' + ':'.join(key_parts)
+                )
+                file = local_cache.get(cache_key)
+                if file is NOT_FOUND or file:
+                    cache_requests.labels(
+                        cache=cache_key_prefix, result='local'
+                    ).inc()
+                    return None if file is NOT_FOUND else file
 
-                file = await func(*args, **kwargs)
+                result = 'shared'
+
+                async def load() -> FileInDB | None:
+                    nonlocal result
+                    result = 'miss'
+                    file = await func(*args, **kwargs)
+                    return file and FileInDB.model_validate(file)
+
+                async def fetch() -> FileInDB | None:
+                    nonlocal result
+                    result = 'hit'
+                    return await load_entry(
+                        cache,
+                        cache_key,
+                        load,
+                        dumps=FileInDB.model_dump_json,
+                        loads=FileInDB.model_validate_json,
+                    )
+
+                file = await single_flight(cache_key, fetch)
+                cache_requests.labels(
+                    cache=cache_key_prefix, result=result
+                ).inc()
                 if file:
-                    file_data = FileInDB.model_validate(file)
-                    await cache.set(
+                    local_cache.set(cache_key, file)
+                else:
+                    local_cache.set(
                         cache_key,
-                        file_data.model_dump_json(),
-                        ex=app_settings.redis_cache_ttl_sec,
+                        NOT_FOUND,
+                        ttl=app_settings.cache_negative_ttl_sec,
                     )
 
                 return file
@@ -94,6 +234,8 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
     @cache_result(
         'file_id',
         ['user_id', 'id'],
+        generation_key=user_generation_key,
+        generation_fields=['user_id'],
     )
     async def get_for_user(
         self,
@@ -115,7 +257,12 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
 
         return file
 
-    @cache_result('file_path', ['user_id', 'path', 'name'])
+    @cache_result(
+        'file_path',
+        ['user_id', 'path', 'name'],
+        generation_key=folder_generation_key,
+        generation_fields=['user_id', 'path'],
+    )
     async def get_file_on_path(
         self,
         db: AsyncSession,
@@ -138,31 +285,102 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
 
         return file
 
-    async def get_status_for_user(
-        self, db: AsyncSession, user_id: int
-    ) -> ModelType | Status | None:
+    async def get_file_on_path_for_update(
+        self, db: AsyncSession, user_id: int, path: str, name: str
+    ) -> ModelType | None:
         """
-        Получение статуса использования дискового пространства пользователем
+        Получение фйла по пути с блокировкой строки до конца транзакции
         """
 
         stmt = (
-            select(
-                self._model.path,
-                func.sum(self._model.size).label('used'),
-                func.count().label('files'),
+            select(self._model)
+            .where(
+                self._model.user_id == user_id,
+                self._model.path == path,
+                self._model.name == name,
             )
-            .where(self._model.user_id == user_id)
-            .group_by(self._model.path)
+            .with_for_update()
         )
+        results = await db.execute(statement=stmt)
+        return results.scalar_one_or_none()
 
+    async def get_files_on_paths_for_update(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        paths_and_names: list[tuple[str, str]],
+    ) -> list[ModelType]:
+        """
+        Получение файлов по путям с блокировкой строк до конца транзакции
+
+        Строки блокируются в порядке путей, как и при вставке
+        """
+
+        if not paths_and_names:
+            return []
+
+        stmt = (
+            select(self._model)
+            .where(
+                self._model.user_id == user_id,
+                tuple_(self._model.path, self._model.name).in_(
+                    paths_and_names
+                ),
+            )
+            .order_by(self._model.path, self._model.name)
+            .with_for_update()
+        )
         results = await db.execute(statement=stmt)
-        return results.all()
+        return results.scalars().all()
+
+    async def upsert_many(
+        self, db: AsyncSession, files: list[FileCreate]
+    ) -> list[ModelType]:
+        """
+        Создание или перезапись файлов одним запросом
+        """
+
+        if not files:
+            return []
+
+        stmt = insert(self._model).values(
+            [
+                {
+                    'id': uuid4(),
+                    'user_id': file.user_id,
+                    'path': file.path,
+                    'name': file.name,
+                    'size': file.size,
+                    'hash': file.hash,
+                    'created_at': naive_utcnow(),
+                    'updated_at': naive_utcnow(),
+                }
+                for file in sorted(files, key=lambda f: (f.path, f.name))
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint='_user_path_name_uc',
+            set_={
+                'size': stmt.excluded.size,
+                'hash': stmt.excluded.hash,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        ).returning(self._model)
+        results = await db.execute(
+            statement=stmt, execution_options={'populate_existing': True}
+        )
+        return results.scalars().all()
 
     async def search_files(
         self, db: AsyncSession, user_id: int, options: SearchOptions
     ) -> ModelType | Status | None:
         """
         Получение файлов пользователя по заданным параметрам
+
+        Поиск по расширению использует индекс по сохранённому последнему
+        расширению, составные расширения вроде tar.gz дополнительно
+        проверяются по окончанию имени. Поиск по подстроке использует
+        триграммные индексы по имени и пути
         """
 
         filters = []
@@ -170,7 +388,16 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
             filters.append(self._model.path == options.path)
 
         if options.extension:
-            filters.append(self._model.name.endswith(options.extension))
+            extension = options.extension.lstrip('.').lower()
+            filters.append(
+                self._model.extension == extension.rpartition('.')[2]
+            )
+            if '.' in extension:
+                filters.append(
+                    func.lower(self._model.name).endswith(
+                        f'.{extension}', autoescape=True
+                    )
+                )
 
         if options.query:
             filters.append(
@@ -195,6 +422,462 @@ class RepositoryFile(RepositoryDB[FileModel, FileCreate, FileUpdate]):
 file_crud = RepositoryFile(FileModel)
 
 
+def file_object_name(file: FileInDB) -> str:
+    """
+    Имя объекта с содержимым файла в хранилище
+
+    Файлы, загруженные до появления блобов, хранятся под своим id
+    """
+
+    if file.hash:
+        return blob_object_name(file.hash)
+
+    return str(file.id)
+
+
+async def invalidate_file_cache(
+    cache: Redis, user_id: int, paths: Iterable[str]
+) -> None:
+    """
+    Сброс кешированных файлов пользователя после изменения папок
+
+    Файлы по id кешируются в поколении пользователя, по пути -
+    в поколении папки
+    """
+
+    await bump_generations(
+        cache,
+        user_generation_key(user_id),
+        *(folder_generation_key(user_id, path) for path in set(paths)),
+    )
+
+
+async def link_file_content(
+    db: AsyncSession,
+    cache: Redis,
+    *,
+    user_id: int,
+    path: str,
+    name: str,
+    hash: str,
+    size: int,
+) -> ModelType:
+    """
+    Создание или перезапись файла со ссылкой на блоб
+
+    Ссылка на блоб должна быть получена в той же транзакции
+    """
+
+    file = await file_crud.get_file_on_path_for_update(
+        db=db, user_id=user_id, path=path, name=name
+    )
+    old_file = file and FileInDB.model_validate(file)
+    if file is None:
+        file = FileModel(
+            user_id=user_id, name=name, path=path, size=size, hash=hash
+        )
+        db.add(file)
+        usage = (size, 1)
+    else:
+        usage = (size - file.size, 0)
+        file.size = size
+        file.hash = hash
+
+    await folder_usage_crud.add(db, user_id, {path: usage})
+
+    unreferenced = []
+    if old_file and old_file.hash:
+        unreferenced = await release_blobs(db, [old_file.hash])
+
+    await db.commit()
+    await db.refresh(file)
+    await invalidate_file_cache(cache, user_id, [path])
+    await purge_blobs(db, unreferenced)
+
+    if old_file and not old_file.hash:
+        await storage.remove([file_object_name(old_file)])
+
+    return file
+
+
+async def save_file_content(
+    db: AsyncSession,
+    cache: Redis,
+    *,
+    user_id: int,
+    path: str,
+    name: str,
+    hash: str,
+    size: int,
+    staging_name: str,
+) -> ModelType:
+    """
+    Создание или перезапись файла с загруженным содержимым
+    """
+
+    await store_blob(db, hash, size, staging_name)
+
+    return await link_file_content(
+        db,
+        cache,
+        user_id=user_id,
+        path=path,
+        name=name,
+        hash=hash,
+        size=size,
+    )
+
+
+async def save_existing_content(
+    db: AsyncSession,
+    cache: Redis,
+    *,
+    user_id: int,
+    path: str,
+    name: str,
+    hash: str,
+    size: int,
+) -> ModelType | None:
+    """
+    Создание файла с уже сохранённым содержимым без передачи данных
+
+    Возвращает None, если содержимого с таким хешем и размером нет.
+    Владение содержимым проверяется заранее verify_upload_proof
+    """
+
+    if not await blob_crud.acquire_existing(db, hash, size):
+        return None
+
+    return await link_file_content(
+        db,
+        cache,
+        user_id=user_id,
+        path=path,
+        name=name,
+        hash=hash,
+        size=size,
+    )
+
+
+def upload_challenge_key(challenge_id: str) -> str:
+    """
+    Ключ запроса доказательства владения содержимым
+    """
+
+    return f'upload_challenge:{challenge_id}'
+
+
+async def create_upload_challenge(
+    cache: Redis, user_id: int, hash: str, size: int
+) -> UploadChallenge:
+    """
+    Выбор случайного диапазона содержимого, хеш которого должен
+    прислать клиент
+
+    Диапазон выдаётся и для содержимого, которого нет в хранилище,
+    поэтому по ответу нельзя узнать о чужих файлах, не имея их данных
+    """
+
+    length = min(size, app_settings.instant_upload_proof_size_byte)
+    challenge = UploadChallenge(
+        id=uuid4().hex,
+        offset=secrets.randbelow(size - length + 1),
+        length=length,
+    )
+    await cache.set(
+        upload_challenge_key(challenge.id),
+        json.dumps(
+            [user_id, hash, size, challenge.offset, challenge.length]
+        ),
+        ex=app_settings.instant_upload_challenge_ttl_sec,
+    )
+
+    return challenge
+
+
+async def verify_upload_proof(
+    cache: Redis,
+    *,
+    user_id: int,
+    hash: str,
+    size: int,
+    challenge_id: str,
+    proof: str,
+) -> bool:
+    """
+    Проверка хеша SHA-256 выбранного диапазона содержимого
+
+    Запрос одноразовый: после любой попытки нужно получить новый
+    """
+
+    data = await cache.getdel(upload_challenge_key(challenge_id))
+    if data is None:
+        return False
+
+    owner, expected_hash, expected_size, offset, length = json.loads(data)
+    if (owner, expected_hash, expected_size) != (user_id, hash, size):
+        return False
+
+    digest = hashlib.sha256()
+    if length:
+        try:
+            chunks = await storage.read_stream(
+                blob_object_name(hash), offset=offset, length=length
+            )
+            async for chunk in chunks:
+                digest.update(chunk)
+        except STORAGE_ERRORS:
+            return False
+
+    return hmac.compare_digest(digest.hexdigest(), proof)
+
+
+async def hash_upload_file(file: UploadFile) -> tuple[str, int]:
+    """
+    Подсчёт хеша SHA-256 и размера загружаемого файла
+    """
+
+    content_hash = hashlib.sha256()
+    size = 0
+    async for chunk in iter_upload_file(file):
+        content_hash.update(chunk)
+        size += len(chunk)
+    await file.seek(0)
+
+    return content_hash.hexdigest(), size
+
+
+async def store_new_blobs(
+    db: AsyncSession, sources: dict[str, UploadFile], counts: Counter
+) -> set[str]:
+    """
+    Запись содержимого новых блобов с ограничением параллельности
+
+    Ссылки на блобы, которые не удалось записать, освобождаются.
+    Возвращает хеши таких блобов
+    """
+
+    async def store(hash: str) -> None:
+        await storage.write_stream(
+            blob_object_name(hash), iter_upload_file(sources[hash])
+        )
+
+    hashes = sorted(sources)
+    results = await gather_bounded(
+        (store(hash) for hash in hashes),
+        app_settings.batch_upload_concurrency,
+        return_exceptions=True,
+    )
+    failed = set()
+    for hash, result in zip(hashes, results):
+        if isinstance(result, STORAGE_ERRORS):
+            logger.error(f'Storage error occurred: {result}')
+            failed.add(hash)
+        elif isinstance(result, BaseException):
+            raise result
+
+    if failed:
+        await release_blobs(
+            db, [hash for hash in failed for _ in range(counts[hash])]
+        )
+
+    return failed
+
+
+async def link_files_batch(
+    db: AsyncSession, cache: Redis, user_id: int, files: list[FileCreate]
+) -> list[FileInDB]:
+    """
+    Создание или перезапись файлов со ссылками на блобы одним запросом
+
+    Ссылки на блобы должны быть получены в той же транзакции
+    """
+
+    old_files = {
+        (file.path, file.name): FileInDB.model_validate(file)
+        for file in await file_crud.get_files_on_paths_for_update(
+            db, user_id, [(file.path, file.name) for file in files]
+        )
+    }
+    saved = [
+        FileInDB.model_validate(file)
+        for file in await file_crud.upsert_many(db, files)
+    ]
+
+    usage = {}
+    for file in files:
+        used, count = usage.get(file.path, (0, 0))
+        old_file = old_files.get((file.path, file.name))
+        if old_file:
+            usage[file.path] = (used + file.size - old_file.size, count)
+        else:
+            usage[file.path] = (used + file.size, count + 1)
+    await folder_usage_crud.add(db, user_id, usage)
+    unreferenced = await release_blobs(
+        db, [file.hash for file in old_files.values() if file.hash]
+    )
+
+    await db.commit()
+    await invalidate_file_cache(cache, user_id, usage)
+    await purge_blobs(db, unreferenced)
+
+    legacy_objects = [
+        file_object_name(file) for file in old_files.values() if not file.hash
+    ]
+    if legacy_objects:
+        await storage.remove(legacy_objects)
+
+    return saved
+
+
+async def save_files_batch(
+    db: AsyncSession,
+    cache: Redis,
+    *,
+    user_id: int,
+    files: list[tuple[str, str, UploadFile]],
+) -> list[BatchUploadResult]:
+    """
+    Сохранение нескольких файлов
+
+    Содержимое файлов записывается параллельно, метаданные всех файлов
+    сохраняются одним запросом. Ошибки отдельных файлов возвращаются
+    в результатах и не мешают сохранению остальных
+    """
+
+    results = [BatchUploadResult(path=path + name) for path, name, _ in files]
+    uploads = {}
+    for result, (path, name, file) in zip(results, files):
+        if not name:
+            result.error = 'File name is required'
+        elif (path, name) in uploads:
+            result.error = 'Duplicate file path'
+        else:
+            uploads[(path, name)] = (result, file)
+
+    hashes = await gather_bounded(
+        (hash_upload_file(file) for _, file in uploads.values()),
+        app_settings.batch_upload_concurrency,
+    )
+    counts = Counter(hash for hash, _ in hashes)
+    new_hashes = await blob_crud.acquire_many(db, dict(hashes), counts)
+    sources = {}
+    for (_, file), (hash, _) in zip(uploads.values(), hashes):
+        if hash in new_hashes:
+            sources.setdefault(hash, file)
+    failed = await store_new_blobs(db, sources, counts)
+
+    items = []
+    for ((path, name), (result, _)), (hash, size) in zip(
+        uploads.items(), hashes
+    ):
+        if hash in failed:
+            result.error = 'Storage error'
+        else:
+            items.append(
+                FileCreate(
+                    user_id=user_id, path=path, name=name, size=size, hash=hash
+                )
+            )
+
+    saved = await link_files_batch(db, cache, user_id, items)
+    await purge_blobs(db, sorted(failed))
+    for file in saved:
+        uploads[(file.path, file.name)][0].file = file
+
+    return results
+
+
+async def delete_files(
+    db: AsyncSession, cache: Redis, user_id: int, *conditions: Any
+) -> FilesDeleted:
+    """
+    Удаление файлов пользователя, подходящих под условия
+
+    Строки удаляются одним запросом, объекты хранилища - пачками
+    через удаление нескольких объектов. Содержимое удаляется из хранилища,
+    только если на него больше не ссылается ни один файл
+    """
+
+    results = await db.execute(
+        delete(FileModel)
+        .where(FileModel.user_id == user_id, *conditions)
+        .returning(
+            FileModel.id, FileModel.path, FileModel.size, FileModel.hash
+        )
+    )
+    files = results.all()
+    if not files:
+        await db.rollback()
+        return FilesDeleted(files=0, size=0)
+
+    changes = {}
+    for file in files:
+        used, count = changes.get(file.path, (0, 0))
+        changes[file.path] = (used - file.size, count - 1)
+    await folder_usage_crud.add(db, user_id, changes)
+    unreferenced = await release_blobs(
+        db, (file.hash for file in files if file.hash)
+    )
+    await db.commit()
+    await invalidate_file_cache(cache, user_id, changes)
+    await purge_blobs(db, unreferenced)
+
+    legacy_objects = [str(file.id) for file in files if not file.hash]
+    if legacy_objects:
+        await storage.remove(legacy_objects)
+
+    return FilesDeleted(
+        files=len(files), size=sum(file.size for file in files)
+    )
+
+
+async def delete_file(db: AsyncSession, cache: Redis, file: FileInDB) -> None:
+    """
+    Удаление файла
+    """
+
+    await delete_files(db, cache, file.user_id, FileModel.id == file.id)
+
+
+async def delete_files_by_list(
+    db: AsyncSession,
+    cache: Redis,
+    user_id: int,
+    ids: list[UUID],
+    paths: list[str],
+) -> FilesDeleted:
+    """
+    Удаление файлов пользователя по списку id и полных путей
+    """
+
+    conditions = []
+    if ids:
+        conditions.append(FileModel.id.in_(ids))
+    if paths:
+        conditions.append(
+            tuple_(FileModel.path, FileModel.name).in_(
+                [split_path_and_name(path) for path in paths]
+            )
+        )
+    if not conditions:
+        return FilesDeleted(files=0, size=0)
+
+    return await delete_files(db, cache, user_id, or_(*conditions))
+
+
+async def delete_folder(
+    db: AsyncSession, cache: Redis, user_id: int, path: str
+) -> FilesDeleted:
+    """
+    Удаление всех файлов папки и её подпапок
+    """
+
+    return await delete_files(
+        db, cache, user_id, FileModel.path.startswith(path, autoescape=True)
+    )
+
+
 def set_file_name(path_str: str | None, file: UploadFile) -> str:
     """
     Задание имени файла
@@ -241,3 +924,108 @@ def split_path_and_name(file_path: str) -> tuple[str, str]:
     file_path = file_path[: right_margin + 1]
 
     return file_path, file_name
+
+
+def encode_cursor(file: FileModel | FileInDB) -> str:
+    """
+    Формирование курсора следующей страницы по последнему файлу
+    """
+
+    data = json.dumps([file.path, file.name]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Разбор курсора страницы
+
+    Для некорректного курсора поднимает ValueError
+    """
+
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        path, name = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+    if not isinstance(path, str) or not isinstance(name, str):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+    return path, name
+
+
+async def iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    """
+    Чтение загружаемого файла частями
+    """
+
+    while chunk := await file.read(app_settings.upload_chunk_size_byte):
+        yield chunk
+
+
+def upload_progress_key(user_id: int, path: str, name: str) -> str:
+    """
+    Ключ прогресса загрузки файла
+    """
+
+    return f'upload_progress:{user_id}:{path}{name}'
+
+
+async def set_upload_progress(
+    cache: Redis, user_id: int, progress: UploadProgress
+) -> None:
+    """
+    Сохранение прогресса загрузки файла
+    """
+
+    path, name = split_path_and_name(progress.path)
+    await cache.set(
+        upload_progress_key(user_id, path, name),
+        progress.model_dump_json(),
+        ex=app_settings.upload_progress_ttl_sec,
+    )
+
+
+async def get_upload_progress(
+    cache: Redis, user_id: int, path: str, name: str
+) -> UploadProgress | None:
+    """
+    Получение прогресса загрузки файла
+    """
+
+    progress = await cache.get(upload_progress_key(user_id, path, name))
+    if progress is None:
+        return None
+
+    return UploadProgress.model_validate_json(progress)
+
+
+async def get_download_url(
+    cache: Redis, user_id: int, file: FileInDB
+) -> tuple[str, int] | None:
+    """
+    Получение подписанной ссылки на скачивание файла и срока её жизни
+
+    None, если хранилище не выдаёт подписанных ссылок
+    """
+
+    key = f'presigned_url:{user_id}:{file.id}:{file.hash}'
+    async with cache.pipeline(transaction=False) as pipe:
+        url, ttl = await pipe.get(key).ttl(key).execute()
+    if url and ttl > 0:
+        return url.decode(), ttl
+
+    url = await storage.presigned_url(
+        file_object_name(file), file.name
+    )
+    if url is None:
+        return None
+
+    ttl = (
+        app_settings.minio_url_expires_sec
+        - app_settings.minio_url_expires_margin_sec
+    )
+    if ttl > 0:
+        await cache.set(key, url, ex=ttl)
+
+    return url, max(ttl, 0)
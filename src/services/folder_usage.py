@@ -0,0 +1,64 @@
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.folder_usage import FolderUsage as FolderUsageModel
+from src.schemas.folder_usage import FolderUsageCreate, FolderUsageUpdate
+
+from .base import ModelType, RepositoryDB
+
+UsageChanges = Mapping[str, tuple[int, int]]
+
+
+class RepositoryFolderUsage(
+    RepositoryDB[FolderUsageModel, FolderUsageCreate, FolderUsageUpdate]
+):
+    async def add(
+        self, db: AsyncSession, user_id: int, changes: UsageChanges
+    ) -> None:
+        """
+        Изменение счётчиков папок пользователя
+
+        changes - изменения занятого места и количества файлов по папкам.
+        Счётчики меняются в транзакции изменения файлов, строки
+        обновляются в порядке путей, чтобы параллельные транзакции
+        не блокировали друг друга
+        """
+
+        rows = [
+            {'user_id': user_id, 'path': path, 'used': used, 'files': files}
+            for path, (used, files) in sorted(changes.items())
+            if used or files
+        ]
+        if not rows:
+            return
+
+        stmt = insert(self._model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self._model.user_id, self._model.path],
+            set_={
+                'used': self._model.used + stmt.excluded.used,
+                'files': self._model.files + stmt.excluded.files,
+            },
+        )
+        await db.execute(statement=stmt)
+
+    async def get_for_user(
+        self, db: AsyncSession, user_id: int
+    ) -> list[ModelType]:
+        """
+        Получение счётчиков непустых папок пользователя
+        """
+
+        stmt = (
+            select(self._model)
+            .where(self._model.user_id == user_id, self._model.files > 0)
+            .order_by(self._model.path)
+        )
+        results = await db.execute(statement=stmt)
+        return results.scalars().all()
+
+
+folder_usage_crud = RepositoryFolderUsage(FolderUsageModel)
@@ -1,53 +1,138 @@
-from aiohttp import ClientConnectorError
-from miniopy_async import S3Error
-from redis import RedisError
-from redis.asyncio import Redis
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
 from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.config import logger
-from src.services.minio import MinioHandler
+from src.core.config import app_settings, logger
+from src.core.utils import naive_utcnow
+from src.db.db import async_session
+from src.db.redis import redis
+from src.services.cache import single_flight
+from src.services.storage import storage
+
+Probe = Callable[[], Awaitable[Any]]
+
+
+class ServiceUnavailable(Exception):
+    """
+    Сервис отвечает, но не готов к работе
+    """
 
 
-async def check_database_status(db: AsyncSession) -> bool:
+async def check_database_status() -> None:
     """
     Проверка статуса postgres
     """
 
-    try:
+    async with async_session() as db:
         await db.execute(text('SELECT 1'))
-        return True
-    except (SQLAlchemyError, ConnectionRefusedError) as e:
-        logger.error(f'Postgres error occurred: {e}')
 
-        return False
 
-
-async def check_redis_status(cache: Redis) -> bool:
+async def check_redis_status() -> None:
     """
     Проверка статуса redis
     """
 
-    try:
-        await cache.ping()
-        return True
-    except RedisError as e:
-        logger.error(f'Redis error occurred: {e}')
-        return False
+    await redis.ping()
 
 
-async def check_minio_status() -> bool:
+async def check_storage_status() -> None:
     """
-    Проверка статуса minio
+    Проверка статуса хранилища
     """
 
-    try:
-        minio_handler = MinioHandler()
-        buckets = await minio_handler.minio_client.list_buckets()
-        if buckets:
-            return True
-    except (ClientConnectorError, S3Error) as e:
-        logger.error(f'Minio error occurred: {e}')
+    if not await storage.check():
+        raise ServiceUnavailable(f'Bucket {storage.bucket_name} not found')
+
+
+class ServiceProber:
+    """
+    Проверка доступности связанных сервисов с измерением времени доступа
+
+    Сервисы проверяются параллельно, каждая проверка ограничена
+    по времени. Результаты обновляются в фоне и отдаются из памяти,
+    чтобы частые проверки балансировщика не нагружали сервисы
+    """
+
+    def __init__(
+        self, probes: dict[str, Probe], timeout: float, interval: float
+    ) -> None:
+        self.probes = probes
+        self.timeout = timeout
+        self.interval = interval
+        self.results: dict[str, float | None] = {}
+        self.checked_at: datetime | None = None
+        self._refreshed_at = float('-inf')
+
+    async def probe(self, name: str, check: Probe) -> float | None:
+        """
+        Время доступа к сервису в миллисекундах или None,
+        если сервис недоступен
+
+        Любая ошибка проверки означает недоступность сервиса
+        """
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+        except Exception as e:
+            logger.error(f'{name} is not available: {e!r}')
+            return None
+
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    async def refresh(self) -> dict[str, Any]:
+        """
+        Проверка всех сервисов
+        """
+
+        latencies = await asyncio.gather(
+            *(self.probe(name, check) for name, check in self.probes.items())
+        )
+        self.results = dict(zip(self.probes, latencies))
+        self.checked_at = naive_utcnow()
+        self._refreshed_at = time.monotonic()
+
+        return self.status()
+
+    def status(self) -> dict[str, Any]:
+        """
+        Последние результаты проверки
+        """
+
+        return {**self.results, 'checked_at': self.checked_at}
+
+    async def get_status(self) -> dict[str, Any]:
+        """
+        Результаты проверки, не старше двух интервалов обновления
+
+        Если фоновая проверка не работает, устаревшие результаты
+        обновляются одним запросом на процесс
+        """
+
+        if time.monotonic() - self._refreshed_at > 2 * self.interval:
+            return await single_flight('ping', self.refresh)
+
+        return self.status()
+
+    async def run(self) -> None:
+        """
+        Периодическое обновление результатов
+        """
+
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
 
-    return False
+service_prober = ServiceProber(
+    probes={
+        'postgres': check_database_status,
+        'redis': check_redis_status,
+        storage.name: check_storage_status,
+    },
+    timeout=app_settings.ping_timeout_sec,
+    interval=app_settings.ping_interval_sec,
+)
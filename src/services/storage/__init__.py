@@ -0,0 +1,24 @@
+from src.core.config import app_settings
+from src.services.storage.base import (  # noqa: F401
+    STORAGE_ERRORS,
+    Part,
+    StorageBackend,
+    StorageUpload,
+    UploadNotFound,
+)
+from src.services.storage.local import LocalStorage
+from src.services.storage.minio import MinioHandler
+
+
+def create_storage() -> StorageBackend:
+    """
+    Хранилище, выбранное настройкой storage_backend
+    """
+
+    if app_settings.storage_backend == 'local':
+        return LocalStorage(app_settings.storage_local_root)
+
+    return MinioHandler()
+
+
+storage = create_storage()
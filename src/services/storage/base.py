@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple
+from uuid import UUID
+
+from miniopy_async import S3Error
+
+# Ошибки хранилищ: ошибки S3 API и ошибки ввода-вывода,
+# в том числе ошибки соединения aiohttp
+STORAGE_ERRORS = (S3Error, OSError)
+
+
+class Part(NamedTuple):
+    """
+    Загруженная часть multipart загрузки
+    """
+
+    part_number: int
+    etag: str
+
+
+class UploadNotFound(FileNotFoundError):
+    """
+    Multipart загрузка завершена, отменена или не существовала
+    """
+
+
+class StorageUpload(ABC):
+    """
+    Загрузка объекта частями
+
+    Части загружаются в любом порядке и собираются в объект
+    по номерам при завершении загрузки
+    """
+
+    upload_id: str | None
+    parts: list[Part]
+
+    @abstractmethod
+    async def create(self) -> str:
+        """
+        Создание загрузки
+        """
+
+    @abstractmethod
+    async def upload_part(
+        self, data: bytes, part_number: int | None = None
+    ) -> Part:
+        """
+        Загрузка части, без номера - следующей по порядку
+        """
+
+    @abstractmethod
+    async def complete(self) -> None:
+        """
+        Сборка объекта из частей
+        """
+
+    @abstractmethod
+    async def abort(self) -> None:
+        """
+        Отмена загрузки и удаление частей
+        """
+
+
+class StorageBackend(ABC):
+    """
+    Хранилище содержимого файлов
+
+    Объекты адресуются именами, которые формирует сервис,
+    и хранятся в бакете, выбранном create_backet
+    """
+
+    name: str
+    bucket_name: str
+
+    async def start(self) -> None:
+        """
+        Подготовка соединений с хранилищем
+        """
+
+    async def close(self) -> None:
+        """
+        Закрытие соединений с хранилищем
+        """
+
+    @abstractmethod
+    async def create_backet(self, backet_name: str) -> None:
+        """
+        Создание бакета и переключение на него
+        """
+
+    @abstractmethod
+    async def delete_bucket(self) -> None:
+        """
+        Удаление бакета вместе с объектами
+        """
+
+    @abstractmethod
+    async def check(self) -> bool:
+        """
+        Проверка, что бакет доступен
+        """
+
+    @abstractmethod
+    def multipart_upload(
+        self, object_name: str, upload_id: str | None = None
+    ) -> StorageUpload:
+        """
+        Новая или уже начатая multipart загрузка объекта
+        """
+
+    @abstractmethod
+    async def write_stream(
+        self,
+        file_name: UUID | str,
+        chunks: AsyncIterator[bytes],
+        user_file_name: str | None = None,
+        progress: Callable[[int], Awaitable[None]] | None = None,
+    ) -> int:
+        """
+        Потоковая запись объекта
+
+        Возвращает количество записанных байт
+        """
+
+    @abstractmethod
+    async def read_stream(
+        self, file_name: UUID | str, offset: int = 0, length: int = 0
+    ) -> AsyncIterator[bytes]:
+        """
+        Чтение объекта целиком или length байт начиная с offset
+
+        Объект открывается до возврата, поэтому ошибка отсутствия
+        объекта поднимается до начала передачи
+        """
+
+    @abstractmethod
+    async def exists(self, file_name: UUID | str) -> bool:
+        """
+        Проверка наличия объекта
+        """
+
+    @abstractmethod
+    async def copy(
+        self, source_name: str, target_name: str, size: int
+    ) -> None:
+        """
+        Копирование объекта внутри хранилища
+        """
+
+    @abstractmethod
+    async def remove(self, file_names: list[str]) -> None:
+        """
+        Удаление объектов, отсутствующие объекты пропускаются
+        """
+
+    @abstractmethod
+    async def presigned_url(
+        self, file_name: UUID | str, user_file_name: str
+    ) -> str | None:
+        """
+        Подписанная ссылка на скачивание объекта в обход сервиса
+
+        None, если хранилище не выдаёт ссылок и файл отдаёт сервис
+        """
+
+    def local_path(self, file_name: UUID | str) -> Path | None:
+        """
+        Путь к объекту в файловой системе, если хранилище локальное
+        """
+
+        return None
@@ -0,0 +1,376 @@
+import asyncio
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable
+from uuid import UUID, uuid4
+
+from src.core.config import app_settings
+
+from .base import Part, StorageBackend, StorageUpload, UploadNotFound
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+MULTIPART_DIR = '.multipart'
+TMP_DIR = '.tmp'
+
+
+def write_file(path: Path, data: bytes) -> None:
+    """
+    Атомарная запись файла через временный файл рядом с ним
+    """
+
+    tmp_path = path.with_name(f'.{path.name}.{uuid4().hex}')
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def open_range(path: Path, offset: int) -> BinaryIO:
+    """
+    Открытие файла на чтение с позиции offset
+    """
+
+    file = open(path, 'rb')
+    if offset:
+        file.seek(offset)
+    return file
+
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """
+    Атомарное появление копии файла под новым именем
+
+    Жёсткая ссылка создаётся без копирования данных, копирование
+    используется, если файловая система ссылки не поддерживает
+    """
+
+    tmp_path = target.with_name(f'.{target.name}.{uuid4().hex}')
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def concat_parts(parts: list[Path], target: Path) -> None:
+    """
+    Сборка файла из частей по порядку
+    """
+
+    tmp_path = target.with_name(f'.{target.name}.{uuid4().hex}')
+    try:
+        with open(tmp_path, 'wb') as file:
+            for part in parts:
+                with open(part, 'rb') as part_file:
+                    shutil.copyfileobj(part_file, file, WRITE_BUFFER_SIZE)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def remove_files(paths: list[Path]) -> None:
+    """
+    Удаление файлов, отсутствующие файлы пропускаются
+    """
+
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+class LocalUpload(StorageUpload):
+    """
+    Multipart загрузка в локальный каталог
+
+    Части хранятся отдельными файлами в каталоге загрузки
+    и объединяются в объект при завершении
+    """
+
+    def __init__(
+        self, storage: 'LocalStorage', object_name: str, upload_id: str | None
+    ) -> None:
+        self.storage = storage
+        self.object_name = object_name
+        self.upload_id = upload_id
+        self.parts: list[Part] = []
+
+    @property
+    def upload_dir(self) -> Path:
+        """
+        Каталог с частями загрузки
+        """
+
+        return self.storage.bucket_dir / MULTIPART_DIR / str(self.upload_id)
+
+    def part_path(self, part_number: int) -> Path:
+        """
+        Путь к файлу части
+        """
+
+        return self.upload_dir / f'{part_number}.part'
+
+    async def create(self) -> str:
+        """
+        Создание каталога загрузки
+        """
+
+        self.upload_id = uuid4().hex
+        await asyncio.to_thread(self.upload_dir.mkdir, parents=True)
+        return self.upload_id
+
+    async def upload_part(
+        self, data: bytes, part_number: int | None = None
+    ) -> Part:
+        """
+        Запись части в файл каталога загрузки
+        """
+
+        if self.upload_id is None:
+            await self.create()
+
+        part_number = part_number or len(self.parts) + 1
+        try:
+            await asyncio.to_thread(
+                write_file, self.part_path(part_number), data
+            )
+        except FileNotFoundError:
+            raise UploadNotFound(self.upload_id)
+
+        part = Part(part_number, hashlib.md5(data).hexdigest())
+        self.parts.append(part)
+        return part
+
+    async def complete(self) -> None:
+        """
+        Сборка объекта из частей и удаление каталога загрузки
+        """
+
+        parts = sorted(self.parts, key=lambda part: part.part_number)
+        path = self.storage.local_path(self.object_name)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        try:
+            await asyncio.to_thread(
+                concat_parts,
+                [self.part_path(part.part_number) for part in parts],
+                path,
+            )
+        except FileNotFoundError:
+            raise UploadNotFound(self.upload_id)
+
+        await self.abort()
+
+    async def abort(self) -> None:
+        """
+        Удаление каталога загрузки
+        """
+
+        if self.upload_id is not None:
+            await asyncio.to_thread(
+                shutil.rmtree, self.upload_dir, ignore_errors=True
+            )
+
+
+class LocalStorage(StorageBackend):
+    """
+    Хранилище в каталоге локальной или сетевой файловой системы
+
+    Бакету соответствует каталог внутри root, объекту - файл с путём,
+    равным имени объекта. Объекты появляются атомарно после полной
+    записи. Операции с файлами выполняются в потоках, чтобы не
+    блокировать цикл событий на медленных дисках и NFS
+    """
+
+    name = 'local'
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self.bucket_name = app_settings.minio_bucket_name
+
+    @property
+    def bucket_dir(self) -> Path:
+        """
+        Каталог бакета
+        """
+
+        return self.root / self.bucket_name
+
+    def local_path(self, file_name: UUID | str) -> Path:
+        """
+        Путь к файлу объекта
+        """
+
+        name = str(file_name)
+        if name.startswith('/') or '..' in name.split('/'):
+            raise ValueError(f'Invalid object name: {name}')
+
+        return self.bucket_dir / name
+
+    async def create_backet(self, backet_name: str) -> None:
+        """
+        Создание каталога бакета
+        """
+
+        self.bucket_name = backet_name
+        for directory in (self.bucket_dir / TMP_DIR, self.bucket_dir):
+            await asyncio.to_thread(
+                directory.mkdir, parents=True, exist_ok=True
+            )
+
+    async def delete_bucket(self) -> None:
+        """
+        Удаление каталога бакета
+        """
+
+        await asyncio.to_thread(
+            shutil.rmtree, self.bucket_dir, ignore_errors=True
+        )
+
+    async def check(self) -> bool:
+        """
+        Проверка наличия каталога бакета
+        """
+
+        return await asyncio.to_thread(self.bucket_dir.is_dir)
+
+    def multipart_upload(
+        self, object_name: str, upload_id: str | None = None
+    ) -> LocalUpload:
+        """
+        Новая или уже начатая multipart загрузка объекта
+        """
+
+        return LocalUpload(self, object_name, upload_id)
+
+    async def write_stream(
+        self,
+        file_name: UUID | str,
+        chunks: AsyncIterator[bytes],
+        user_file_name: str | None = None,
+        progress: Callable[[int], Awaitable[None]] | None = None,
+    ) -> int:
+        """
+        Потоковая запись файла
+
+        Данные пишутся во временный файл блоками по WRITE_BUFFER_SIZE
+        и переносятся под имя объекта после записи на диск
+        """
+
+        path = self.local_path(file_name)
+        tmp_path = self.bucket_dir / TMP_DIR / uuid4().hex
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        file = await asyncio.to_thread(open, tmp_path, 'wb')
+        buffer = bytearray()
+        size = 0
+
+        try:
+            try:
+                async for chunk in chunks:
+                    buffer += chunk
+                    size += len(chunk)
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        await asyncio.to_thread(file.write, bytes(buffer))
+                        buffer.clear()
+                        if progress:
+                            await progress(size)
+                await asyncio.to_thread(file.write, bytes(buffer))
+                await asyncio.to_thread(file.flush)
+                await asyncio.to_thread(os.fsync, file.fileno())
+            finally:
+                await asyncio.to_thread(file.close)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+            raise
+
+        if progress:
+            await progress(size)
+
+        return size
+
+    async def read_stream(
+        self, file_name: UUID | str, offset: int = 0, length: int = 0
+    ) -> AsyncIterator[bytes]:
+        """
+        Чтение файла целиком или length байт начиная с offset
+        """
+
+        file = await asyncio.to_thread(
+            open_range, self.local_path(file_name), offset
+        )
+        return self.iter_file(file, length)
+
+    async def iter_file(
+        self, file: BinaryIO, length: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Чтение открытого файла частями до конца или length байт
+        """
+
+        chunk_size = app_settings.download_chunk_size_byte
+        remaining = length or None
+        try:
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(
+                    chunk_size, remaining
+                )
+                chunk = await asyncio.to_thread(file.read, size)
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(file.close)
+
+    async def exists(self, file_name: UUID | str) -> bool:
+        """
+        Проверка наличия файла
+        """
+
+        return await asyncio.to_thread(self.local_path(file_name).is_file)
+
+    async def presigned_url(
+        self, file_name: UUID | str, user_file_name: str
+    ) -> None:
+        """
+        Подписанных ссылок нет, файл отдаёт сервис
+        """
+
+        return None
+
+    async def copy(
+        self, source_name: str, target_name: str, size: int
+    ) -> None:
+        """
+        Копирование файла, по возможности жёсткой ссылкой
+        """
+
+        target = self.local_path(target_name)
+        await asyncio.to_thread(
+            target.parent.mkdir, parents=True, exist_ok=True
+        )
+        await asyncio.to_thread(
+            link_or_copy, self.local_path(source_name), target
+        )
+
+    async def remove(self, file_names: list[str]) -> None:
+        """
+        Удаление файлов
+        """
+
+        await asyncio.to_thread(
+            remove_files, [self.local_path(name) for name in file_names]
+        )
@@ -0,0 +1,498 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+from urllib.parse import quote
+from uuid import UUID
+
+from aiohttp import ClientResponse, ClientSession, TCPConnector
+from miniopy_async import Minio, S3Error
+from miniopy_async.commonconfig import CopySource
+from miniopy_async.datatypes import Object
+from miniopy_async.deleteobjects import DeleteObject
+from miniopy_async.helpers import MAX_PART_SIZE, genheaders
+
+from src.core.config import app_settings, logger
+from src.core.metrics import minio_bytes, minio_request_duration
+from src.core.utils import content_disposition, gather_bounded
+
+from .base import Part, StorageBackend, StorageUpload, UploadNotFound
+
+MAX_DELETE_OBJECTS = 1000
+
+
+async def iter_response(response: ClientResponse) -> AsyncIterator[bytes]:
+    """
+    Чтение ответа MinIO частями
+    """
+
+    try:
+        async for chunk in response.content.iter_chunked(
+            app_settings.download_chunk_size_byte
+        ):
+            minio_bytes.labels(direction='in').inc(len(chunk))
+            yield chunk
+    finally:
+        response.release()
+
+
+async def split_parts(
+    chunks: AsyncIterator[bytes], part_size: int
+) -> AsyncIterator[bytes | memoryview]:
+    """
+    Нарезка потока на части размером part_size
+
+    Фрагменты копируются один раз, при склейке части. Последняя часть
+    короче part_size и может быть пустой
+    """
+
+    pending: list[bytes] = []
+    pending_size = 0
+    async for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < part_size:
+            continue
+
+        data = memoryview(b''.join(pending))
+        while len(data) >= part_size:
+            yield data[:part_size]
+            data = data[part_size:]
+        pending = [bytes(data)]
+        pending_size = len(data)
+
+    yield b''.join(pending)
+
+
+@contextmanager
+def missing_upload_as_not_found(upload_id: str | None) -> Iterator[None]:
+    """
+    Замена ошибки NoSuchUpload на UploadNotFound
+    """
+
+    try:
+        yield
+    except S3Error as e:
+        if e.code == 'NoSuchUpload':
+            raise UploadNotFound(upload_id) from e
+        raise
+
+
+class MultipartUpload(StorageUpload):
+    """
+    Multipart загрузка объекта
+    """
+
+    def __init__(
+        self,
+        minio_client: Minio,
+        bucket_name: str,
+        object_name: str,
+        metadata: dict | None = None,
+        upload_id: str | None = None,
+    ) -> None:
+        self.minio_client = minio_client
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self.metadata = metadata or {}
+        self.upload_id = upload_id
+        self.parts: list[Part] = []
+
+    async def create(self) -> str:
+        """
+        Создание загрузки
+        """
+
+        headers = genheaders(self.metadata, None, None, None, False)
+        headers['Content-Type'] = 'application/octet-stream'
+        timer = minio_request_duration.labels(operation='create_multipart')
+        with timer.time():
+            self.upload_id = await self.minio_client._create_multipart_upload(
+                self.bucket_name, self.object_name, headers
+            )
+        return self.upload_id
+
+    async def upload_part(
+        self, data: bytes | memoryview, part_number: int | None = None
+    ) -> Part:
+        """
+        Загрузка части
+        """
+
+        if self.upload_id is None:
+            await self.create()
+
+        part_number = part_number or len(self.parts) + 1
+        with (
+            minio_request_duration.labels(operation='put_part').time(),
+            missing_upload_as_not_found(self.upload_id),
+        ):
+            etag = await self.minio_client._upload_part(
+                self.bucket_name,
+                self.object_name,
+                data,
+                {},
+                self.upload_id,
+                part_number,
+            )
+        minio_bytes.labels(direction='out').inc(len(data))
+        part = Part(part_number, etag)
+        self.parts.append(part)
+        return part
+
+    async def complete(self) -> None:
+        """
+        Завершение загрузки
+        """
+
+        parts = sorted(self.parts, key=lambda part: part.part_number)
+        timer = minio_request_duration.labels(operation='complete_multipart')
+        with (
+            timer.time(),
+            missing_upload_as_not_found(self.upload_id),
+        ):
+            await self.minio_client._complete_multipart_upload(
+                self.bucket_name, self.object_name, self.upload_id, parts
+            )
+
+    async def upload_part_copy(
+        self, source_name: str, offset: int, length: int
+    ) -> Part:
+        """
+        Копирование диапазона другого объекта в качестве части
+        """
+
+        if self.upload_id is None:
+            await self.create()
+
+        part_number = len(self.parts) + 1
+        headers = {
+            'x-amz-copy-source': quote(f'/{self.bucket_name}/{source_name}'),
+            'x-amz-copy-source-range': (
+                f'bytes={offset}-{offset + length - 1}'
+            ),
+        }
+        with minio_request_duration.labels(operation='copy_part').time():
+            etag, _ = await self.minio_client._upload_part_copy(
+                self.bucket_name,
+                self.object_name,
+                self.upload_id,
+                part_number,
+                headers,
+            )
+        part = Part(part_number, etag)
+        self.parts.append(part)
+        return part
+
+    async def abort(self) -> None:
+        """
+        Отмена загрузки
+        """
+
+        if self.upload_id is not None:
+            await self.minio_client._abort_multipart_upload(
+                self.bucket_name, self.object_name, self.upload_id
+            )
+
+
+class MinioHandler(StorageBackend):
+    """
+    Хранилище в бакете MinIO
+    """
+
+    name = 'minio'
+
+    def __init__(self) -> None:
+        self.minio_client = Minio(
+            endpoint=app_settings.minio_endpoint,
+            access_key=app_settings.minio_root_user,
+            secret_key=app_settings.minio_root_password,
+            secure=False,
+        )
+        self.bucket_name = app_settings.minio_bucket_name
+        self.expires = timedelta(seconds=app_settings.minio_url_expires_sec)
+        self.session: ClientSession | None = None
+
+    async def start(self) -> None:
+        """
+        Создание пула соединений для чтения файлов
+        """
+
+        if self.session is None or self.session.closed:
+            connector = TCPConnector(
+                limit=app_settings.minio_pool_size,
+                limit_per_host=app_settings.minio_pool_size_per_host,
+                keepalive_timeout=app_settings.minio_keepalive_sec,
+            )
+            self.session = ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        """
+        Закрытие пула соединений
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def create_backet(self, backet_name: str) -> None:
+        """
+        Создание бакета
+        """
+
+        if not await self.minio_client.bucket_exists(backet_name):
+            await self.minio_client.make_bucket(backet_name)
+        self.bucket_name = backet_name
+
+    async def check(self) -> bool:
+        """
+        Проверка наличия бакета
+        """
+
+        return await self.minio_client.bucket_exists(self.bucket_name)
+
+    def multipart_upload(
+        self, object_name: str, upload_id: str | None = None
+    ) -> MultipartUpload:
+        """
+        Новая или уже начатая multipart загрузка объекта
+        """
+
+        return MultipartUpload(
+            self.minio_client,
+            self.bucket_name,
+            object_name,
+            upload_id=upload_id,
+        )
+
+    async def write_stream(
+        self,
+        file_name: UUID | str,
+        chunks: AsyncIterator[bytes],
+        user_file_name: str | None = None,
+        progress: Callable[[int], Awaitable[None]] | None = None,
+    ) -> int:
+        """
+        Потоковая запись файла
+
+        Поток нарезается на части multipart загрузки, поэтому расход
+        памяти не зависит от размера файла.
+        Возвращает количество записанных байт.
+        """
+
+        object_name = str(file_name)
+        part_size = app_settings.minio_part_size_byte
+        metadata = {}
+        if user_file_name:
+            metadata['Content-Disposition'] = content_disposition(
+                user_file_name
+            )
+        upload = MultipartUpload(
+            self.minio_client, self.bucket_name, object_name, metadata
+        )
+        size = 0
+
+        try:
+            async for data in split_parts(chunks, part_size):
+                size += len(data)
+                if len(data) < part_size:
+                    break
+                await upload.upload_part(data)
+                if progress:
+                    await progress(size)
+
+            if upload.upload_id is None:
+                with (
+                    BytesIO(data) as file_stream,
+                    minio_request_duration.labels(operation='put').time(),
+                ):
+                    await self.minio_client.put_object(
+                        self.bucket_name,
+                        object_name,
+                        file_stream,
+                        length=len(data),
+                        metadata=metadata,
+                    )
+                minio_bytes.labels(direction='out').inc(len(data))
+            else:
+                if data:
+                    await upload.upload_part(data)
+                await upload.complete()
+        except BaseException:
+            await upload.abort()
+            raise
+
+        if progress:
+            await progress(size)
+
+        return size
+
+    async def read(
+        self, file_name, offset: int = 0, length: int = 0
+    ) -> ClientResponse:
+        """
+        Чтение файла целиком или length байт начиная с offset
+
+        Соединение берётся из общего пула и возвращается в него вызовом
+        response.release() после чтения ответа
+        """
+
+        await self.start()
+        with minio_request_duration.labels(operation='get').time():
+            return await self.minio_client.get_object(
+                self.bucket_name,
+                str(file_name),
+                self.session,
+                offset=offset,
+                length=length,
+            )
+
+    async def read_stream(
+        self, file_name: UUID | str, offset: int = 0, length: int = 0
+    ) -> AsyncIterator[bytes]:
+        """
+        Чтение файла частями через соединение из общего пула
+        """
+
+        response = await self.read(file_name, offset=offset, length=length)
+        return iter_response(response)
+
+    async def stat(self, file_name) -> Object:
+        """
+        Получение информации о файле
+        """
+
+        with minio_request_duration.labels(operation='stat').time():
+            return await self.minio_client.stat_object(
+                self.bucket_name, str(file_name)
+            )
+
+    async def exists(self, file_name: UUID | str) -> bool:
+        """
+        Проверка наличия файла
+        """
+
+        try:
+            await self.stat(file_name)
+        except S3Error as e:
+            if e.code == 'NoSuchKey':
+                return False
+            raise
+
+        return True
+
+    async def copy(
+        self, source_name: str, target_name: str, size: int
+    ) -> None:
+        """
+        Копирование объекта на стороне MinIO
+        """
+
+        if size <= MAX_PART_SIZE:
+            with minio_request_duration.labels(operation='copy').time():
+                await self.minio_client.copy_object(
+                    self.bucket_name,
+                    target_name,
+                    CopySource(self.bucket_name, source_name),
+                )
+            return
+
+        upload = MultipartUpload(
+            self.minio_client, self.bucket_name, target_name
+        )
+        try:
+            for offset in range(0, size, MAX_PART_SIZE):
+                await upload.upload_part_copy(
+                    source_name, offset, min(MAX_PART_SIZE, size - offset)
+                )
+            await upload.complete()
+        except BaseException:
+            await upload.abort()
+            raise
+
+    async def remove_batch(self, file_names: list[str]) -> None:
+        """
+        Удаление файлов одним запросом
+        """
+
+        objects = [DeleteObject(file_name) for file_name in file_names]
+        with minio_request_duration.labels(operation='delete').time():
+            result = await self.minio_client._delete_objects(
+                self.bucket_name, objects, quiet=True
+            )
+        for error in result.error_list:
+            logger.error(f'Minio error occurred: {error}')
+
+    async def remove(self, file_names: list[str]) -> None:
+        """
+        Удаление файлов пачками не больше MAX_DELETE_OBJECTS
+
+        Пачки удаляются параллельно, не больше minio_delete_concurrency
+        запросов одновременно
+        """
+
+        await gather_bounded(
+            (
+                self.remove_batch(file_names[i : i + MAX_DELETE_OBJECTS])
+                for i in range(0, len(file_names), MAX_DELETE_OBJECTS)
+            ),
+            app_settings.minio_delete_concurrency,
+        )
+
+    async def presigned_url(self, file_name, user_file_name: str) -> str:
+        """
+        Получение подписанной ссылки на скачивание файла
+        """
+
+        response_headers = {
+            'response-content-disposition': content_disposition(
+                user_file_name
+            )
+        }
+        return await self.minio_client.presigned_get_object(
+            self.bucket_name,
+            str(file_name),
+            expires=self.expires,
+            response_headers=response_headers,
+            change_host=app_settings.minio_public_url,
+        )
+
+    async def iter_object_names(
+        self, prefix: str | None = None
+    ) -> AsyncIterator[list[str]]:
+        """
+        Получение имён объектов бакета страницами
+
+        list_objects возвращает только первую страницу листинга,
+        поэтому следующие запрашиваются после последнего полученного имени
+        """
+
+        start_after = None
+        while True:
+            objects = await self.minio_client.list_objects(
+                self.bucket_name,
+                prefix=prefix,
+                recursive=True,
+                start_after=start_after,
+            )
+            if not objects:
+                return
+            names = [obj.object_name for obj in objects]
+            yield names
+            start_after = names[-1]
+
+    async def delete_files_in_bucket(self) -> None:
+        """
+        Удаление фалов в бакете
+        """
+
+        async for names in self.iter_object_names():
+            await self.remove(names)
+
+    async def delete_bucket(self) -> None:
+        """
+        Удаление бакета
+        """
+
+        await self.delete_files_in_bucket()
+        await self.minio_client.remove_bucket(self.bucket_name)
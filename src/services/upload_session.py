@@ -0,0 +1,358 @@
+import asyncio
+import hashlib
+import time
+from contextlib import suppress
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import app_settings, logger
+from src.core.hashing import ResumableSha256
+from src.models.file import File as FileModel
+from src.schemas.upload_session import UploadSessionState
+from src.services.blob import staging_object_name
+from src.services.file import save_file_content, split_path_and_name
+from src.services.storage import STORAGE_ERRORS, Part, storage
+
+UPLOAD_SESSIONS_KEY = 'upload_sessions'
+# Наибольшее количество частей multipart загрузки в S3
+MAX_UPLOAD_PARTS = 10000
+
+
+class UploadSessionIncomplete(Exception):
+    """
+    Получены не все части загрузки
+    """
+
+    def __init__(self, missing: list[int]) -> None:
+        super().__init__(f'Missing chunks: {missing}')
+        self.missing = missing
+
+
+class UploadSessionTooLarge(Exception):
+    """
+    Файл не помещается в MAX_UPLOAD_PARTS частей
+    """
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(f'Upload size must not exceed {max_size} bytes')
+        self.max_size = max_size
+
+
+def upload_session_key(session_id: str) -> str:
+    """
+    Ключ состояния сессии загрузки
+    """
+
+    return f'upload_session:{session_id}'
+
+
+def upload_parts_key(session_id: str) -> str:
+    """
+    Ключ полученных частей сессии загрузки
+    """
+
+    return f'upload_session:{session_id}:parts'
+
+
+def chunk_length(session: UploadSessionState, number: int) -> int:
+    """
+    Ожидаемый размер части, последняя часть может быть меньше
+    """
+
+    offset = (number - 1) * session.chunk_size
+    return min(session.chunk_size, session.size - offset)
+
+
+async def create_upload_session(
+    cache: Redis, user_id: int, path: str, size: int
+) -> UploadSessionState:
+    """
+    Создание сессии загрузки и multipart загрузки в хранилище для неё
+
+    Сессия регистрируется в множестве сессий с временем последней
+    активности, по которому её находит reap_upload_sessions.
+    Файл больше MAX_UPLOAD_PARTS частей отклоняется до создания загрузки
+    """
+
+    chunk_size = app_settings.minio_part_size_byte
+    if size > MAX_UPLOAD_PARTS * chunk_size:
+        raise UploadSessionTooLarge(MAX_UPLOAD_PARTS * chunk_size)
+
+    object_name = staging_object_name()
+    upload = storage.multipart_upload(object_name)
+    await upload.create()
+
+    session = UploadSessionState(
+        id=uuid4().hex,
+        path=path,
+        size=size,
+        chunk_size=chunk_size,
+        chunks=-(-size // chunk_size),
+        user_id=user_id,
+        upload_id=upload.upload_id,
+        object_name=object_name,
+    )
+    if ResumableSha256.available:
+        session.hash_state = ResumableSha256().state().hex()
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.set(upload_session_key(session.id), session.model_dump_json())
+        pipe.zadd(UPLOAD_SESSIONS_KEY, {session.id: time.time()})
+        await pipe.execute()
+
+    return session
+
+
+async def get_upload_session(
+    cache: Redis, user_id: int, session_id: str
+) -> UploadSessionState | None:
+    """
+    Получение сессии загрузки пользователя с номерами полученных частей
+    """
+
+    async with cache.pipeline(transaction=False) as pipe:
+        pipe.get(upload_session_key(session_id))
+        pipe.hkeys(upload_parts_key(session_id))
+        data, received = await pipe.execute()
+
+    if data is None:
+        return None
+
+    session = UploadSessionState.model_validate_json(data)
+    if session.user_id != user_id:
+        return None
+
+    session.received = sorted(int(number) for number in received)
+    return session
+
+
+async def upload_chunk(
+    cache: Redis, session: UploadSessionState, number: int, data: bytes
+) -> None:
+    """
+    Загрузка части как части multipart загрузки с тем же номером
+
+    Повторная загрузка части заменяет предыдущую
+    """
+
+    upload = storage.multipart_upload(
+        session.object_name, session.upload_id
+    )
+    part = await upload.upload_part(data, number)
+
+    async with cache.pipeline(transaction=False) as pipe:
+        pipe.hset(upload_parts_key(session.id), str(number), part.etag)
+        pipe.zadd(UPLOAD_SESSIONS_KEY, {session.id: time.time()}, xx=True)
+        await pipe.execute()
+
+    await update_session_hash(cache, session.id, number, data)
+
+
+async def update_session_hash(
+    cache: Redis, session_id: str, number: int, data: bytes
+) -> None:
+    """
+    Добавление части к хешу содержимого, сохранённому в сессии
+
+    Хеш считается по непрерывному началу файла: часть, пришедшая
+    раньше предыдущих, и все следующие за ней дочитываются из хранилища
+    при завершении. Повторная загрузка уже учтённой части сбрасывает
+    хеш, тогда при завершении читается весь объект
+    """
+
+    key = upload_session_key(session_id)
+    async with cache.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                await pipe.watch(key)
+                state = await pipe.get(key)
+                if state is None:
+                    return
+                session = UploadSessionState.model_validate_json(state)
+                if session.hash_state is None:
+                    return
+                if number <= session.hashed_chunks:
+                    session.hash_state = None
+                elif number == session.hashed_chunks + 1:
+                    hasher = ResumableSha256(
+                        bytes.fromhex(session.hash_state)
+                    )
+                    hasher.update(data)
+                    session.hash_state = hasher.state().hex()
+                    session.hashed_chunks = number
+                else:
+                    return
+                pipe.multi()
+                pipe.set(key, session.model_dump_json())
+                await pipe.execute()
+                return
+            except WatchError:
+                continue
+
+
+async def claim_upload_session(cache: Redis, session_id: str) -> bool:
+    """
+    Захват сессии для завершения или отмены
+
+    Сессию может захватить только один запрос или процесс
+    """
+
+    return bool(await cache.zrem(UPLOAD_SESSIONS_KEY, session_id))
+
+
+async def delete_upload_session_state(cache: Redis, session_id: str) -> None:
+    """
+    Удаление состояния сессии загрузки из Redis
+    """
+
+    await cache.delete(
+        upload_session_key(session_id), upload_parts_key(session_id)
+    )
+
+
+async def remove_upload_session(
+    cache: Redis, session: UploadSessionState
+) -> None:
+    """
+    Удаление состояния сессии и отмена её multipart загрузки
+    """
+
+    upload = storage.multipart_upload(
+        session.object_name, session.upload_id
+    )
+    try:
+        await upload.abort()
+    except STORAGE_ERRORS as e:
+        logger.warning(f'Failed to abort upload {session.id}: {e}')
+
+    await delete_upload_session_state(cache, session.id)
+
+
+async def hash_session_content(session: UploadSessionState) -> str:
+    """
+    Хеш SHA-256 собранного объекта
+
+    Подсчёт продолжается с состояния, сохранённого в сессии, из
+    хранилища читается только часть объекта после учтённых частей
+    """
+
+    offset = 0
+    if session.hash_state is not None:
+        content_hash = ResumableSha256(bytes.fromhex(session.hash_state))
+        offset = min(session.hashed_chunks * session.chunk_size, session.size)
+    else:
+        content_hash = hashlib.sha256()
+
+    if offset < session.size:
+        chunks = await storage.read_stream(
+            session.object_name, offset=offset, length=session.size - offset
+        )
+        async for chunk in chunks:
+            content_hash.update(chunk)
+
+    return content_hash.hexdigest()
+
+
+async def complete_upload_session(
+    db: AsyncSession, cache: Redis, session: UploadSessionState
+) -> FileModel | None:
+    """
+    Сборка объекта из частей и создание файла
+
+    Хеш содержимого считается по мере получения частей, объект
+    дочитывается только после пропусков в порядке частей. Временный
+    объект копируется в блоб, только если такого содержимого ещё нет,
+    и удаляется в любом случае. Возвращает None, если сессия уже
+    завершена или отменена
+    """
+
+    chunks = range(1, session.chunks + 1)
+    missing = sorted(set(chunks) - set(session.received))
+    if missing:
+        raise UploadSessionIncomplete(missing)
+
+    if not await claim_upload_session(cache, session.id):
+        return None
+
+    path, name = split_path_and_name(session.path)
+    async with cache.pipeline(transaction=False) as pipe:
+        pipe.get(upload_session_key(session.id))
+        pipe.hgetall(upload_parts_key(session.id))
+        state, parts = await pipe.execute()
+    if state is not None:
+        # Хеш последних частей мог быть учтён после чтения сессии
+        session = UploadSessionState.model_validate_json(state)
+    upload = storage.multipart_upload(
+        session.object_name, session.upload_id
+    )
+    upload.parts = [
+        Part(int(number), etag.decode()) for number, etag in parts.items()
+    ]
+    try:
+        await upload.complete()
+    except BaseException:
+        await remove_upload_session(cache, session)
+        raise
+
+    try:
+        file = await save_file_content(
+            db,
+            cache,
+            user_id=session.user_id,
+            path=path,
+            name=name,
+            hash=await hash_session_content(session),
+            size=session.size,
+            staging_name=session.object_name,
+        )
+    finally:
+        await delete_upload_session_state(cache, session.id)
+        with suppress(*STORAGE_ERRORS):
+            await storage.remove([session.object_name])
+
+    return file
+
+
+async def reap_stale_upload_sessions(cache: Redis) -> int:
+    """
+    Отмена сессий загрузки, в которые ничего не загружали
+    upload_session_ttl_sec
+
+    Сессию отменяет процесс, который первым удалил её из множества
+    сессий. Возвращает количество отменённых сессий
+    """
+
+    deadline = time.time() - app_settings.upload_session_ttl_sec
+    session_ids = await cache.zrangebyscore(
+        UPLOAD_SESSIONS_KEY, '-inf', deadline
+    )
+    reaped = 0
+    for session_id in session_ids:
+        session_id = session_id.decode()
+        if not await claim_upload_session(cache, session_id):
+            continue
+        data = await cache.get(upload_session_key(session_id))
+        if data is not None:
+            await remove_upload_session(
+                cache, UploadSessionState.model_validate_json(data)
+            )
+        logger.info(f'Aborted stale upload session {session_id}')
+        reaped += 1
+
+    return reaped
+
+
+async def reap_upload_sessions(cache: Redis) -> None:
+    """
+    Периодическая отмена брошенных сессий загрузки
+    """
+
+    while True:
+        try:
+            await reap_stale_upload_sessions(cache)
+        except (RedisError, *STORAGE_ERRORS) as e:
+            logger.warning(f'Upload session reaper failed: {e}')
+
+        await asyncio.sleep(app_settings.upload_session_reap_interval_sec)
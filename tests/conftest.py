@@ -1,3 +1,4 @@
+import hashlib
 from io import BytesIO
 
 import asyncpg
@@ -12,10 +13,11 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.core.config import app_settings
-from src.db.db import get_session
+from src.db.db import get_session, instrument_engine
 from src.main import app
 from src.models import Base
-from src.services.minio import minio_handler
+from src.services.cache import local_cache
+from src.services.storage import storage
 
 URL_PREFIX_AUTH = '/api/v1/users'
 URL_PREFIX_FILE = '/api/v1/files'
@@ -57,12 +59,13 @@ def anyio_backend():
 
 @pytest.fixture(scope='session')
 async def create_test_backet():
-    minio_handler.bucket_name = app_settings.minio_test_bucket_name
-    await minio_handler.create_backet(app_settings.minio_test_bucket_name)
+    storage.bucket_name = app_settings.minio_test_bucket_name
+    await storage.create_backet(app_settings.minio_test_bucket_name)
 
     yield
 
-    await minio_handler.delete_bucket()
+    await storage.delete_bucket()
+    await storage.close()
 
 
 @pytest.fixture(scope='session')
@@ -93,8 +96,10 @@ async def db_engine(create_test_database):
     engine = create_async_engine(
         app_settings.dsn_test, echo=False, future=True, poolclass=NullPool
     )
+    instrument_engine(engine)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    local_cache.clear()
 
     yield engine
 
@@ -175,6 +180,34 @@ async def create_files(async_client, headers, test_file):
         assert response.status_code == status.HTTP_201_CREATED
 
 
+@pytest.fixture()
+def instant_upload(monkeypatch):
+    monkeypatch.setattr(app_settings, 'instant_upload_enabled', True)
+
+
+async def precheck_upload(async_client, headers, path, content):
+    obj = {
+        'path': path,
+        'size': len(content),
+        'hash': hashlib.sha256(content).hexdigest(),
+    }
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/precheck', headers=headers, json=obj
+    )
+    assert response.status_code == status.HTTP_200_OK
+    challenge = response.json()['challenge']
+    start = challenge['offset']
+    proof = content[start : start + challenge['length']]
+
+    obj['challenge'] = challenge['id']
+    obj['proof'] = hashlib.sha256(proof).hexdigest()
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/precheck', headers=headers, json=obj
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
 def filter_files_result(files_result):
     path_and_name = []
     files_result.sort(key=lambda x: (x['path'], x['name']))
@@ -1,6 +1,18 @@
+import hashlib
+import io
+import zipfile
+
 import pytest
 from fastapi import status
+from sqlalchemy import delete
 
+from src.core.config import app_settings
+from src.db.redis import redis
+from src.models import Blob, File
+from src.schemas.file import FileInDB
+from src.services.blob import blob_object_name, release_blobs
+from src.services.file import delete_file
+from src.services.storage import storage
 from tests.conftest import (
     FILE_NAME,
     FILE_PATH,
@@ -10,6 +22,7 @@ from tests.conftest import (
     UPLOAD_FILE_NAME,
     URL_PREFIX_AUTH,
     URL_PREFIX_FILE,
+    precheck_upload,
 )
 
 
@@ -90,3 +103,812 @@ async def test_file_download_for_id(async_client, headers, create_file):
         params=params,
     )
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.anyio
+async def test_file_upload_stream(async_client, headers, create_test_backet):
+    content = b'this is some streamed file content'
+    params = {'path': FILE_PATH + UPLOAD_FILE_NAME}
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers=headers,
+        params=params,
+        content=content,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    result = response.json()
+    assert result['name'] == UPLOAD_FILE_NAME
+    assert result['path'] == FILE_PATH
+    assert result['size'] == len(content)
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/upload/progress', headers=headers, params=params
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['received'] == len(content)
+
+
+@pytest.mark.anyio
+async def test_file_upload_stream_multipart(
+    async_client, headers, create_test_backet, monkeypatch
+):
+    part_size = 5 * 1024 * 1024
+    monkeypatch.setattr(app_settings, 'minio_part_size_byte', part_size)
+    content = bytes(range(256)) * (2 * part_size // 256) + b'tail'
+    params = {'path': FILE_PATH + 'large_' + UPLOAD_FILE_NAME}
+
+    async def chunks():
+        for i in range(0, len(content), 100_000):
+            yield content[i : i + 100_000]
+
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers=headers,
+        params=params,
+        content=chunks(),
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()['size'] == len(content)
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download', headers=headers, params=params
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == content
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('content_length', ['abc', '-1'])
+async def test_file_upload_stream_invalid_content_length(
+    async_client, headers, create_test_backet, content_length
+):
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers={**headers, 'Content-Length': content_length},
+        params={'path': FILE_PATH + UPLOAD_FILE_NAME},
+        content=b'content',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+@pytest.mark.skipif(
+    storage.name == 'local', reason='Local storage has no presigned URLs'
+)
+async def test_file_download_redirect(async_client, headers, create_file):
+    params = {'path': create_file['id'], 'redirect': True}
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params=params,
+    )
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    location = response.headers['location']
+    assert create_file['hash'] in location
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params=params,
+    )
+    assert response.headers['location'] == location
+
+
+@pytest.mark.anyio
+@pytest.mark.skipif(
+    storage.name != 'local', reason='Storage has presigned URLs'
+)
+async def test_file_download_redirect_fallback(
+    async_client, headers, create_file, test_file
+):
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': create_file['id'], 'redirect': True},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == test_file['file'][1]
+
+
+@pytest.mark.anyio
+async def test_file_download_range(async_client, headers, create_file):
+    params = {'path': create_file['id']}
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers={**headers, 'Range': 'bytes=0-3'},
+        params=params,
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == b'this'
+    assert response.headers['content-range'] == (
+        f'bytes 0-3/{create_file["size"]}'
+    )
+
+
+@pytest.mark.anyio
+async def test_file_download_multiple_ranges(
+    async_client, headers, create_file
+):
+    params = {'path': create_file['id']}
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers={**headers, 'Range': 'bytes=0-3, -7'},
+        params=params,
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.headers['content-type'].startswith(
+        'multipart/byteranges'
+    )
+    assert int(response.headers['content-length']) == len(response.content)
+    assert b'\r\n\r\nthis\r\n' in response.content
+    assert b'\r\n\r\ncontent\r\n' in response.content
+
+
+@pytest.mark.anyio
+async def test_file_download_not_modified(async_client, headers, create_file):
+    params = {'path': create_file['id']}
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download', headers=headers, params=params
+    )
+    etag = response.headers['etag']
+    last_modified = response.headers['last-modified']
+    assert etag == f'"{create_file["hash"]}"'
+
+    for conditional in (
+        {'If-None-Match': etag},
+        {'If-None-Match': f'"other", W/{etag}'},
+        {'If-Modified-Since': last_modified},
+    ):
+        response = await async_client.get(
+            f'{URL_PREFIX_FILE}/download',
+            headers={**headers, **conditional},
+            params=params,
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers['etag'] == etag
+        assert not response.content
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers={
+            **headers,
+            'If-None-Match': '"other"',
+            'If-Modified-Since': last_modified,
+        },
+        params=params,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers={**headers, 'Range': 'bytes=0-3', 'If-Range': etag},
+        params=params,
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+
+
+@pytest.mark.anyio
+async def test_file_download_range_not_satisfiable(
+    async_client, headers, create_file
+):
+    params = {'path': create_file['id']}
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers={**headers, 'Range': f'bytes={create_file["size"]}-'},
+        params=params,
+    )
+    assert response.status_code == (
+        status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    )
+
+
+@pytest.mark.anyio
+async def test_file_upload_deduplication(
+    async_client, headers, test_file, db_session
+):
+    results = []
+    for path in ('/dedup/first.txt', '/dedup/second.txt'):
+        response = await async_client.post(
+            f'{URL_PREFIX_FILE}/upload',
+            headers=headers,
+            params={'path': path},
+            files=test_file,
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        results.append(response.json())
+
+    first, second = results
+    assert first['hash'] == second['hash']
+    blob = await db_session.get(Blob, first['hash'])
+    assert blob.ref_count >= 2
+    ref_count = blob.ref_count
+
+    await delete_file(db_session, redis, FileInDB(**first))
+    await db_session.refresh(blob)
+    assert blob.ref_count == ref_count - 1
+    assert await storage.exists(blob_object_name(blob.hash))
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': second['id']},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == test_file['file'][1]
+
+
+@pytest.mark.anyio
+async def test_file_upload_rewrites_unreferenced_blob(
+    async_client, headers, db_session, instant_upload
+):
+    content = b'content of a blob whose object was lost'
+    hash = hashlib.sha256(content).hexdigest()
+    params = {'path': '/orphan/file.txt'}
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers=headers,
+        params=params,
+        content=content,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    file = response.json()
+
+    # Ссылка освобождена, объект удалён, а удаление строки не зафиксировано
+    await release_blobs(db_session, [hash])
+    await db_session.execute(delete(File).where(File.id == file['id']))
+    await db_session.commit()
+    await storage.remove([blob_object_name(hash)])
+
+    result = await precheck_upload(
+        async_client, headers, '/orphan/copy.txt', content
+    )
+    assert result == {'exists': False, 'file': None, 'challenge': None}
+
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers=headers,
+        params=params,
+        content=content,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    file = response.json()
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': file['id']},
+    )
+    assert response.content == content
+
+    await delete_file(db_session, redis, FileInDB(**file))
+    assert await db_session.get(Blob, hash) is None
+    assert not await storage.exists(blob_object_name(hash))
+
+
+@pytest.mark.anyio
+async def test_file_upload_precheck(
+    async_client, headers, test_file, instant_upload
+):
+    content = test_file['file'][1]
+    result = await precheck_upload(
+        async_client, headers, '/instant/copy.txt', content
+    )
+    assert result['exists'] is True
+    assert result['file']['path'] == '/instant/'
+    assert result['file']['name'] == 'copy.txt'
+    assert result['file']['hash'] == hashlib.sha256(content).hexdigest()
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': '/instant/copy.txt'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == content
+
+    result = await precheck_upload(
+        async_client, headers, '/instant/missing.txt', b'missing'
+    )
+    assert result == {'exists': False, 'file': None, 'challenge': None}
+
+
+@pytest.mark.anyio
+async def test_file_upload_precheck_requires_proof(
+    async_client, headers, test_file, instant_upload
+):
+    content = test_file['file'][1]
+    obj = {
+        'path': '/instant/stolen.txt',
+        'size': len(content),
+        'hash': hashlib.sha256(content).hexdigest(),
+    }
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/precheck', headers=headers, json=obj
+    )
+    result = response.json()
+    assert result['exists'] is False
+    challenge = result['challenge']
+    assert 0 < challenge['length'] <= len(content)
+
+    obj['challenge'] = challenge['id']
+    obj['proof'] = hashlib.sha256(b'guess').hexdigest()
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/precheck', headers=headers, json=obj
+    )
+    assert response.json() == {
+        'exists': False,
+        'file': None,
+        'challenge': None,
+    }
+
+    # Запрос одноразовый, верный хеш после неудачной попытки не принимается
+    start = challenge['offset']
+    proof = content[start : start + challenge['length']]
+    obj['proof'] = hashlib.sha256(proof).hexdigest()
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/precheck', headers=headers, json=obj
+    )
+    assert response.json()['exists'] is False
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': obj['path']},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_file_upload_precheck_disabled(async_client, headers, test_file):
+    content = test_file['file'][1]
+    obj = {
+        'path': '/instant/disabled.txt',
+        'size': len(content),
+        'hash': hashlib.sha256(content).hexdigest(),
+    }
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/precheck', headers=headers, json=obj
+    )
+    assert response.json() == {
+        'exists': False,
+        'file': None,
+        'challenge': None,
+    }
+
+
+@pytest.mark.anyio
+async def test_user_status(async_client, headers, test_file, db_session):
+    def folder_status(user_status):
+        for folder in user_status['folders']:
+            if folder['path'] == '/usage/':
+                return folder['used'], folder['files']
+
+    size = len(test_file['file'][1])
+    files = []
+    for path in ('/usage/first.txt', '/usage/second.txt'):
+        response = await async_client.post(
+            f'{URL_PREFIX_FILE}/upload',
+            headers=headers,
+            params={'path': path},
+            files=test_file,
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        files.append(response.json())
+
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert folder_status(response.json()) == (2 * size, 2)
+
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers=headers,
+        params={'path': '/usage/first.txt'},
+        content=b'x',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert folder_status(response.json()) == (size + 1, 2)
+
+    for file in files:
+        await delete_file(db_session, redis, FileInDB(**file))
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert folder_status(response.json()) is None
+
+
+@pytest.mark.anyio
+async def test_file_cache_invalidation(async_client, headers, db_session):
+    path = '/cache/overwritten.txt'
+    for content in (b'first version', b'second, longer version'):
+        response = await async_client.put(
+            f'{URL_PREFIX_FILE}/upload',
+            headers=headers,
+            params={'path': path},
+            content=content,
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        file = response.json()
+
+        for params in ({'path': path}, {'path': file['id']}):
+            response = await async_client.get(
+                f'{URL_PREFIX_FILE}/download', headers=headers, params=params
+            )
+            assert response.status_code == status.HTTP_200_OK
+            assert response.content == content
+
+    await delete_file(db_session, redis, FileInDB(**file))
+    for params in ({'path': path}, {'path': file['id']}):
+        response = await async_client.get(
+            f'{URL_PREFIX_FILE}/download', headers=headers, params=params
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_file_not_found_cache_cleared_on_upload(async_client, headers):
+    path = '/cache/later.txt'
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download', headers=headers, params={'path': path}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await async_client.put(
+        f'{URL_PREFIX_FILE}/upload',
+        headers=headers,
+        params={'path': path},
+        content=b'uploaded later',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download', headers=headers, params={'path': path}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b'uploaded later'
+
+
+@pytest.mark.anyio
+async def test_file_upload_batch(async_client, headers, test_file):
+    content = test_file['file'][1]
+    files = [
+        ('files', ('a.txt', content, 'text/plain')),
+        ('files', ('b.txt', b'batch file b', 'text/plain')),
+        ('files', ('sub/c.txt', b'batch file c', 'text/plain')),
+        ('files', ('a.txt', b'duplicate', 'text/plain')),
+    ]
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=headers,
+        params={'path': '/batch'},
+        files=files,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()
+    assert [result['path'] for result in results] == [
+        '/batch/a.txt',
+        '/batch/b.txt',
+        '/batch/sub/c.txt',
+        '/batch/a.txt',
+    ]
+    assert all(result['file'] for result in results[:3])
+    assert results[2]['file']['path'] == '/batch/sub/'
+    assert results[3] == {
+        'path': '/batch/a.txt',
+        'file': None,
+        'error': 'Duplicate file path',
+    }
+
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=headers,
+        params={'path': '/batch/'},
+        files=[('files', ('b.txt', b'overwritten', 'text/plain'))],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]['file']['id'] == results[1]['file']['id']
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': '/batch/b.txt'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b'overwritten'
+
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    folders = {
+        folder['path']: (folder['used'], folder['files'])
+        for folder in response.json()['folders']
+    }
+    assert folders['/batch/'] == (len(content) + len(b'overwritten'), 2)
+    assert folders['/batch/sub/'] == (len(b'batch file c'), 1)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('chunked', [False, True])
+async def test_file_upload_batch_too_large(
+    async_client, headers, create_test_backet, monkeypatch, chunked
+):
+    monkeypatch.setattr(app_settings, 'batch_upload_max_bytes', 1024)
+    request = async_client.build_request(
+        'POST',
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=headers,
+        params={'path': '/batch_too_large'},
+        files=[
+            ('files', (f'{i}.txt', b'x' * 512, 'text/plain'))
+            for i in range(4)
+        ],
+    )
+    content = request.read()
+
+    async def chunks():
+        for i in range(0, len(content), 256):
+            yield content[i : i + 256]
+
+    request_headers = {
+        **headers,
+        'Content-Type': request.headers['Content-Type'],
+    }
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=request_headers,
+        params={'path': '/batch_too_large'},
+        content=chunks() if chunked else content,
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/', headers=headers
+    )
+    assert not any(
+        file['path'] == '/batch_too_large/' for file in response.json()
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('compression', ['stored', 'deflate'])
+async def test_file_download_folder(
+    async_client, headers, create_test_backet, compression
+):
+    contents = {
+        'a.txt': b'archive file a' * 1000,
+        'sub/b.txt': b'archive file b',
+        'sub/deep/c.txt': b'',
+    }
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=headers,
+        params={'path': '/archive'},
+        files=[
+            ('files', (name, content, 'text/plain'))
+            for name, content in contents.items()
+        ],
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download/folder',
+        headers=headers,
+        params={'path': '/archive', 'compression': compression},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['Content-Type'] == 'application/zip'
+    assert response.headers['Content-Disposition'] == (
+        'attachment; filename="archive.zip"'
+    )
+    if compression == 'stored':
+        assert int(response.headers['Content-Length']) == len(
+            response.content
+        )
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        assert {
+            info.filename: archive.read(info) for info in archive.infolist()
+        } == contents
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download/folder',
+        headers=headers,
+        params={'path': '/archive-missing/'},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_file_download_non_ascii_name(
+    async_client, headers, create_test_backet
+):
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=headers,
+        params={'path': '/Отчёты "2024"'},
+        files=[('files', ('итог.txt', b'total', 'text/plain'))],
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download',
+        headers=headers,
+        params={'path': '/Отчёты "2024"/итог.txt'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b'total'
+    assert response.headers['Content-Disposition'] == (
+        'attachment; filename="____.txt"; '
+        "filename*=UTF-8''%D0%B8%D1%82%D0%BE%D0%B3.txt"
+    )
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download/folder',
+        headers=headers,
+        params={'path': '/Отчёты "2024"'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['Content-Disposition'] == (
+        'attachment; filename="______ _2024_.zip"; '
+        "filename*=UTF-8''%D0%9E%D1%82%D1%87%D1%91%D1%82%D1%8B"
+        '%20%222024%22.zip'
+    )
+
+
+@pytest.mark.anyio
+async def test_file_delete(async_client, headers, create_test_backet):
+    contents = {
+        'a.txt': b'delete file a',
+        'b.txt': b'delete file b',
+        'c.txt': b'delete file c',
+        'd.txt': b'delete file d',
+        'sub/e.txt': b'delete file e',
+        'sub/deep/f.txt': b'delete file f',
+    }
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/upload/batch',
+        headers=headers,
+        params={'path': '/delete'},
+        files=[
+            ('files', (name, content, 'text/plain'))
+            for name, content in contents.items()
+        ],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    files = {
+        result['path']: result['file'] for result in response.json()
+    }
+
+    response = await async_client.delete(
+        f'{URL_PREFIX_FILE}/',
+        headers=headers,
+        params={'path': '/delete/a.txt'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'files': 1, 'size': len(contents['a.txt'])}
+
+    response = await async_client.delete(
+        f'{URL_PREFIX_FILE}/',
+        headers=headers,
+        params={'path': files['/delete/b.txt']['id']},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['files'] == 1
+
+    response = await async_client.delete(
+        f'{URL_PREFIX_FILE}/',
+        headers=headers,
+        params={'path': '/delete/a.txt'},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/delete',
+        headers=headers,
+        json={
+            'ids': [files['/delete/c.txt']['id']],
+            'paths': ['/delete/d.txt', '/delete/missing.txt'],
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['files'] == 2
+
+    response = await async_client.delete(
+        f'{URL_PREFIX_FILE}/folder',
+        headers=headers,
+        params={'path': '/delete'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        'files': 2,
+        'size': len(contents['sub/e.txt']) + len(contents['sub/deep/f.txt']),
+    }
+
+    for path in files:
+        response = await async_client.get(
+            f'{URL_PREFIX_FILE}/download',
+            headers=headers,
+            params={'path': path},
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert not [
+        folder
+        for folder in response.json()['folders']
+        if folder['path'].startswith('/delete/')
+    ]
+    for file in files.values():
+        assert not await storage.exists(blob_object_name(file['hash']))
+
+    response = await async_client.delete(
+        f'{URL_PREFIX_FILE}/folder',
+        headers=headers,
+        params={'path': '/delete'},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_get_files_not_modified(async_client, headers):
+    for url, params in (
+        (f'{URL_PREFIX_FILE}/', {}),
+        (f'{URL_PREFIX_FILE}/folder', {'path': '/etag/'}),
+    ):
+        response = await async_client.get(url, headers=headers, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response.headers['etag']
+
+        response = await async_client.get(
+            url, headers={**headers, 'If-None-Match': etag}, params=params
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = await async_client.put(
+            f'{URL_PREFIX_FILE}/upload',
+            headers=headers,
+            params={'path': f'/etag/{len(params)}.txt'},
+            content=b'changed',
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = await async_client.get(
+            url, headers={**headers, 'If-None-Match': etag}, params=params
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers['etag'] != etag
+
+
+@pytest.mark.anyio
+async def test_metrics(async_client, headers, create_file):
+    for _ in range(2):
+        response = await async_client.get(
+            f'{URL_PREFIX_FILE}/download',
+            headers=headers,
+            params={'path': create_file['id']},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    response = await async_client.get('/metrics')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['content-type'].startswith('text/plain')
+    metrics = response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/v1/files/download",status="200"}'
+    ) in metrics
+    assert 'cache_requests_total{cache="file_id",result="local"}' in metrics
+    if storage.name == 'minio':
+        assert (
+            'minio_request_duration_seconds_count{operation="get"}' in metrics
+        )
+        assert 'minio_bytes_total{direction="in"}' in metrics
+        assert 'download_streams_in_progress{kind="file"} 0.0' in metrics
+    assert 'db_query_duration_seconds_count{statement="SELECT"}' in metrics
+    assert 'password_hash_completed_total' in metrics
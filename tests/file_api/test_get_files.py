@@ -62,3 +62,34 @@ async def test_get_files_in_folder(async_client, headers, create_files):
     assert response.status_code == status.HTTP_200_OK
     path_and_name = filter_files_result(response.json())
     assert path_and_name == sorted(FILES_SEARCH_IN_PATH, key=lambda x: (x['path'], x['name']))
+
+
+@pytest.mark.anyio
+async def test_get_files_with_cursor(async_client, headers, create_files):
+    files = []
+    params = {'limit': 2}
+    while True:
+        response = await async_client.get(
+            f'{URL_PREFIX_FILE}/', headers=headers, params=params
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page) <= 2
+        files.extend(page)
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        params['cursor'] = response.headers['X-Next-Cursor']
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/', headers=headers, params={'limit': 100}
+    )
+    assert files == response.json()
+    assert len(files) == len(FILES_FOR_COMPARISON)
+
+
+@pytest.mark.anyio
+async def test_get_files_invalid_cursor(async_client, headers):
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/', headers=headers, params={'cursor': 'invalid'}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
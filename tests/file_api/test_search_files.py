@@ -69,3 +69,48 @@ async def test_search_files_in_query(async_client, headers, create_files):
     assert path_and_name == sorted(
         FILES_SEARCH_IN_QUERY, key=lambda x: (x['path'], x['name'])
     )
+
+
+@pytest.mark.anyio
+async def test_search_files_in_extension_normalized(
+    async_client, headers, create_files
+):
+    options = SearchOptions(extension=f'.{EXTENSION.upper()}').model_dump()
+    response = await async_client.post(
+        f'{URL_PREFIX_FILE}/search',
+        headers=headers,
+        json=options,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    path_and_name = filter_files_result(response.json())
+    assert path_and_name == sorted(
+        FILES_SEARCH_IN_EXTENSION, key=lambda x: (x['path'], x['name'])
+    )
+
+
+@pytest.mark.anyio
+async def test_search_files_in_multi_dot_extension(
+    async_client, headers, test_file
+):
+    for name in ('archive.tar.gz', 'ARCHIVE.TAR.GZ', 'other.gz', 'tar.gz'):
+        response = await async_client.post(
+            f'{URL_PREFIX_FILE}/upload',
+            headers=headers,
+            files=test_file,
+            params={'path': f'/multi_dot/{name}'},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    for extension, names in (
+        ('tar.gz', ['ARCHIVE.TAR.GZ', 'archive.tar.gz']),
+        ('.tar.gz', ['ARCHIVE.TAR.GZ', 'archive.tar.gz']),
+        ('gz', ['ARCHIVE.TAR.GZ', 'archive.tar.gz', 'other.gz', 'tar.gz']),
+    ):
+        options = SearchOptions(extension=extension).model_dump()
+        response = await async_client.post(
+            f'{URL_PREFIX_FILE}/search',
+            headers=headers,
+            json=options,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(file['name'] for file in response.json()) == names
@@ -0,0 +1,195 @@
+import hashlib
+
+import pytest
+from fastapi import status
+
+from src.core.config import app_settings
+from src.db.redis import redis
+from src.services.upload_session import (
+    MAX_UPLOAD_PARTS,
+    UPLOAD_SESSIONS_KEY,
+    reap_stale_upload_sessions,
+    upload_session_key,
+)
+from src.services.storage import storage
+from tests.conftest import TEST_USER, URL_PREFIX_AUTH, URL_PREFIX_FILE
+
+URL_PREFIX_SESSION = f'{URL_PREFIX_FILE}/upload/sessions'
+
+
+@pytest.mark.anyio
+async def test_add_user(async_client):
+    response = await async_client.post(
+        f'{URL_PREFIX_AUTH}/register', json=TEST_USER
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    user = response.json()
+    assert user == {'id': 1, 'login': TEST_USER['login']}
+
+
+@pytest.mark.anyio
+async def test_upload_session(async_client, headers, create_test_backet):
+    chunk_size = app_settings.minio_part_size_byte
+    content = bytes(range(256)) * (chunk_size // 256) + b'last chunk'
+    path = '/sessions/large.bin'
+
+    response = await async_client.post(
+        f'{URL_PREFIX_SESSION}/',
+        headers=headers,
+        json={'path': path, 'size': len(content)},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    session = response.json()
+    assert session['chunk_size'] == chunk_size
+    assert session['chunks'] == 2
+    assert session['received'] == []
+    url = f'{URL_PREFIX_SESSION}/{session["id"]}'
+
+    response = await async_client.put(
+        f'{url}/chunks/2', headers=headers, content=b'short'
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = await async_client.put(
+        f'{url}/chunks/2', headers=headers, content=content[chunk_size:]
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = await async_client.post(f'{url}/complete', headers=headers)
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    response = await async_client.get(url, headers=headers)
+    assert response.json()['received'] == [2]
+
+    response = await async_client.put(
+        f'{url}/chunks/1', headers=headers, content=content[:chunk_size]
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = await async_client.post(f'{url}/complete', headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    file = response.json()
+    assert file['size'] == len(content)
+    assert file['hash'] == hashlib.sha256(content).hexdigest()
+
+    response = await async_client.get(
+        f'{URL_PREFIX_FILE}/download', headers=headers, params={'path': path}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == content
+
+    response = await async_client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_upload_session_hash(async_client, headers, monkeypatch):
+    chunk_size = app_settings.minio_part_size_byte
+    content = bytes(range(256)) * (chunk_size // 256) + b'last chunk'
+    path = '/sessions/hashed.bin'
+    reads = []
+    read_stream = storage.read_stream
+
+    async def recorded_read_stream(name, **kwargs):
+        reads.append(kwargs)
+        return await read_stream(name, **kwargs)
+
+    monkeypatch.setattr(storage, 'read_stream', recorded_read_stream)
+
+    async def upload(chunks):
+        response = await async_client.post(
+            f'{URL_PREFIX_SESSION}/',
+            headers=headers,
+            json={'path': path, 'size': len(content)},
+        )
+        url = f'{URL_PREFIX_SESSION}/{response.json()["id"]}'
+        for number, data in chunks:
+            response = await async_client.put(
+                f'{url}/chunks/{number}', headers=headers, content=data
+            )
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = await async_client.post(f'{url}/complete', headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    # Части по порядку: хеш посчитан при загрузке, объект не читается
+    chunks = [(1, content[:chunk_size]), (2, content[chunk_size:])]
+    file = await upload(chunks)
+    assert file['hash'] == hashlib.sha256(content).hexdigest()
+    assert reads == []
+
+    # Повторная загрузка учтённой части: объект читается целиком
+    content = content[::-1]
+    first, second = content[:chunk_size], content[chunk_size:]
+    file = await upload([(1, first[::-1]), (2, second), (1, first)])
+    assert file['hash'] == hashlib.sha256(content).hexdigest()
+    assert reads == [{'offset': 0, 'length': len(content)}]
+
+
+@pytest.mark.anyio
+async def test_upload_session_too_large(
+    async_client, headers, create_test_backet
+):
+    max_size = MAX_UPLOAD_PARTS * app_settings.minio_part_size_byte
+    response = await async_client.post(
+        f'{URL_PREFIX_SESSION}/',
+        headers=headers,
+        json={'path': '/sessions/huge.bin', 'size': max_size + 1},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert str(max_size) in response.json()['detail']
+
+    response = await async_client.post(
+        f'{URL_PREFIX_SESSION}/',
+        headers=headers,
+        json={'path': '/sessions/huge.bin', 'size': max_size},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()['chunks'] == MAX_UPLOAD_PARTS
+    response = await async_client.delete(
+        f'{URL_PREFIX_SESSION}/{response.json()["id"]}', headers=headers
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.anyio
+async def test_upload_session_abort(async_client, headers):
+    response = await async_client.post(
+        f'{URL_PREFIX_SESSION}/',
+        headers=headers,
+        json={'path': '/sessions/aborted.bin', 'size': 10},
+    )
+    url = f'{URL_PREFIX_SESSION}/{response.json()["id"]}'
+
+    response = await async_client.delete(url, headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = await async_client.put(
+        f'{url}/chunks/1', headers=headers, content=b'0123456789'
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_upload_session_reaper(async_client, headers):
+    response = await async_client.post(
+        f'{URL_PREFIX_SESSION}/',
+        headers=headers,
+        json={'path': '/sessions/stale.bin', 'size': 10},
+    )
+    session = response.json()
+    url = f'{URL_PREFIX_SESSION}/{session["id"]}'
+    response = await async_client.put(
+        f'{url}/chunks/1', headers=headers, content=b'0123456789'
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert await reap_stale_upload_sessions(redis) == 0
+    await redis.zadd(UPLOAD_SESSIONS_KEY, {session['id']: 0})
+    assert await reap_stale_upload_sessions(redis) == 1
+
+    response = await async_client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    assert await redis.get(upload_session_key(session['id'])) is None
+    assert await redis.zscore(UPLOAD_SESSIONS_KEY, session['id']) is None
@@ -0,0 +1,80 @@
+import hashlib
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.core.config import app_settings
+from src.schemas.file import FileInDB
+from src.services import archive
+from src.services.blob import blob_object_name
+from src.services.storage import LocalStorage
+
+BUCKET = 'bucket'
+CHUNK_SIZE = 16
+
+
+async def chunks(data: bytes):
+    yield data
+
+
+@pytest.fixture
+async def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path))
+    await storage.create_backet(BUCKET)
+    monkeypatch.setattr(archive, 'storage', storage)
+    yield storage
+    await storage.delete_bucket()
+
+
+@pytest.mark.anyio
+async def test_prefetch_limit(storage, monkeypatch):
+    monkeypatch.setattr(app_settings, 'zip_prefetch_files', 2)
+    monkeypatch.setattr(app_settings, 'zip_prefetch_chunks', 1)
+    monkeypatch.setattr(app_settings, 'download_chunk_size_byte', CHUNK_SIZE)
+
+    contents = [bytes([i]) * CHUNK_SIZE * 4 for i in range(5)]
+    files = []
+    for content in contents:
+        hash = hashlib.sha256(content).hexdigest()
+        await storage.write_stream(blob_object_name(hash), chunks(content))
+        files.append(
+            FileInDB(
+                id=uuid.uuid4(),
+                user_id=1,
+                name=f'{hash}.bin',
+                path='/',
+                size=len(content),
+                hash=hash,
+                created_at=datetime(2024, 1, 1),
+                updated_at=datetime(2024, 1, 1),
+            )
+        )
+
+    active = peak = 0
+    read_stream = storage.read_stream
+
+    async def counted_read_stream(name, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        stream = await read_stream(name, **kwargs)
+
+        async def iter_stream():
+            nonlocal active
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                active -= 1
+
+        return iter_stream()
+
+    monkeypatch.setattr(storage, 'read_stream', counted_read_stream)
+
+    result = []
+    async for content in archive.iter_prefetched(files):
+        result.append(b''.join([chunk async for chunk in content]))
+
+    assert result == contents
+    assert peak == 2
@@ -1,6 +1,10 @@
+import jwt
 import pytest
 from fastapi import status
 
+from src.core.auth import ALGORITHM
+from src.core.config import app_settings
+
 from .conftest import TEST_USER, URL_PREFIX_AUTH
 
 
@@ -28,6 +32,43 @@ async def test_user_auth_correct(async_client):
         f'{URL_PREFIX_AUTH}/auth', json=TEST_USER
     )
     assert response.status_code == status.HTTP_200_OK
+    token = response.json()['access_token']
+    payload = jwt.decode(
+        token, app_settings.secret_key, algorithms=[ALGORITHM]
+    )
+    assert payload['sub'] == TEST_USER['login']
+    assert payload['uid'] == 1
+    assert 'ver' in payload
+
+
+@pytest.mark.anyio
+async def test_user_revoke_tokens(async_client):
+    response = await async_client.post(
+        f'{URL_PREFIX_AUTH}/auth', json=TEST_USER
+    )
+    headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_client.post(
+        f'{URL_PREFIX_AUTH}/revoke', headers=headers
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await async_client.post(
+        f'{URL_PREFIX_AUTH}/auth', json=TEST_USER
+    )
+    headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+    response = await async_client.get(
+        f'{URL_PREFIX_AUTH}/status', headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
 
 
 @pytest.mark.anyio
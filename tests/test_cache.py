@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from redis.asyncio import Redis
+
+from src.core.config import app_settings
+from src.services.cache import LocalCache, load_entry, single_flight
+
+
+@pytest.fixture
+async def redis():
+    client = Redis.from_url(app_settings.redis_url)
+    yield client
+    await client.aclose()
+
+
+def test_local_cache_lru():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_local_cache_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr('src.services.cache.time.monotonic', lambda: now)
+    cache = LocalCache(maxsize=10, ttl=5)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    now += 5
+    assert cache.get('a') is None
+
+
+def test_local_cache_delete():
+    cache = LocalCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.delete('a', 'missing')
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    cache.clear()
+    assert cache.get('b') is None
+
+
+@pytest.mark.anyio
+async def test_single_flight():
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(
+        *(single_flight('key', load) for _ in range(10))
+    )
+    assert results == [1] * 10
+    assert await single_flight('key', load) == 2
+
+
+@pytest.mark.anyio
+async def test_single_flight_error():
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError
+
+    results = await asyncio.gather(
+        *(single_flight('key', load) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_load_entry_stale_while_revalidate(redis):
+    key = 'test:load_entry'
+    await redis.delete(key, f'lock:{key}')
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return f'value {calls}'
+
+    async def get(key):
+        return await load_entry(redis, key, load, str, bytes.decode)
+
+    assert await get(key) == 'value 1'
+    assert await get(key) == 'value 1'
+
+    await redis.expire(key, app_settings.cache_stale_ttl_sec // 2)
+    await redis.set(f'lock:{key}', 'other')
+    assert await get(key) == 'value 1'
+    assert calls == 1
+
+    await redis.delete(f'lock:{key}')
+    assert await get(key) == 'value 2'
+    assert await redis.get(f'lock:{key}') is None
+    await redis.delete(key)
+
+
+@pytest.mark.anyio
+async def test_load_entry_not_found(redis):
+    key = 'test:load_entry_not_found'
+    await redis.delete(key)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+
+    for _ in range(2):
+        assert await load_entry(redis, key, load, str, bytes.decode) is None
+    assert calls == 1
+    assert await redis.ttl(key) <= app_settings.cache_negative_ttl_sec
+    await redis.delete(key)
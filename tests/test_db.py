@@ -0,0 +1,29 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+def select_timing() -> tuple[float, float]:
+    labels = {'statement': 'SELECT'}
+    return tuple(
+        REGISTRY.get_sample_value(f'db_query_duration_seconds_{name}', labels)
+        or 0
+        for name in ('count', 'sum')
+    )
+
+
+@pytest.mark.anyio
+async def test_failed_query_timing(db_engine):
+    async with db_engine.connect() as conn:
+        count, total = select_timing()
+        with pytest.raises(DBAPIError):
+            await conn.execute(text('SELECT 1 / 0'))
+        await conn.rollback()
+        assert select_timing() == (count, total)
+
+        await conn.execute(text('SELECT pg_sleep(0.01)'))
+
+    new_count, new_total = select_timing()
+    assert new_count == count + 1
+    assert 0.01 <= new_total - total < 1
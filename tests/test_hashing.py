@@ -0,0 +1,25 @@
+import hashlib
+
+import pytest
+
+from src.core.hashing import ResumableSha256
+
+pytestmark = pytest.mark.skipif(
+    not ResumableSha256.available, reason='libcrypto SHA-256 is unavailable'
+)
+
+
+def test_resumable_sha256():
+    data = bytes(range(256)) * 100
+    hasher = ResumableSha256()
+    hasher.update(data[:1000])
+
+    resumed = ResumableSha256(hasher.state())
+    resumed.update(data[1000:])
+    assert resumed.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert hasher.hexdigest() == hashlib.sha256(data[:1000]).hexdigest()
+
+
+def test_resumable_sha256_invalid_state():
+    with pytest.raises(ValueError):
+        ResumableSha256(b'state')
@@ -0,0 +1,149 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.responses import FileResponse, StreamingResponse
+
+from src.schemas.file import FileInDB
+from src.services import download
+from src.services.blob import blob_object_name
+from src.services.storage import LocalStorage, UploadNotFound
+
+BUCKET = 'bucket'
+CONTENT = bytes(range(256)) * 1024
+
+
+async def chunks(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def read_all(storage: LocalStorage, name: str, **kwargs) -> bytes:
+    stream = await storage.read_stream(name, **kwargs)
+    return b''.join([chunk async for chunk in stream])
+
+
+@pytest.fixture
+async def storage(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    await storage.create_backet(BUCKET)
+    yield storage
+    await storage.delete_bucket()
+
+
+@pytest.mark.anyio
+async def test_local_storage_write_and_read(storage):
+    reported = []
+
+    async def progress(size: int) -> None:
+        reported.append(size)
+
+    written = await storage.write_stream(
+        'uploads/object', chunks(CONTENT), progress=progress
+    )
+    assert written == len(CONTENT)
+    assert reported[-1] == len(CONTENT)
+    assert await storage.check()
+    assert await storage.exists('uploads/object')
+    assert await read_all(storage, 'uploads/object') == CONTENT
+    assert (
+        await read_all(storage, 'uploads/object', offset=10, length=20)
+        == CONTENT[10:30]
+    )
+    assert (
+        await read_all(storage, 'uploads/object', offset=len(CONTENT) - 5)
+        == CONTENT[-5:]
+    )
+    assert not list((storage.bucket_dir / '.tmp').iterdir())
+
+
+@pytest.mark.anyio
+async def test_local_storage_write_failure_leaves_nothing(storage):
+    async def broken_chunks():
+        yield b'data'
+        raise ConnectionResetError
+
+    with pytest.raises(ConnectionResetError):
+        await storage.write_stream('uploads/broken', broken_chunks())
+
+    assert not await storage.exists('uploads/broken')
+    assert not list((storage.bucket_dir / '.tmp').iterdir())
+
+
+@pytest.mark.anyio
+async def test_local_storage_copy_and_remove(storage):
+    await storage.write_stream('uploads/source', chunks(CONTENT))
+    await storage.copy('uploads/source', 'blobs/target', len(CONTENT))
+    await storage.remove(['uploads/source', 'uploads/missing'])
+
+    assert not await storage.exists('uploads/source')
+    assert await read_all(storage, 'blobs/target') == CONTENT
+    with pytest.raises(FileNotFoundError):
+        await storage.read_stream('uploads/source')
+
+
+@pytest.mark.anyio
+async def test_local_storage_rejects_names_outside_bucket(storage):
+    for name in ('../escape', '/etc/passwd', 'blobs/../../escape'):
+        with pytest.raises(ValueError):
+            storage.local_path(name)
+
+
+@pytest.mark.anyio
+async def test_local_storage_multipart_upload(storage):
+    upload = storage.multipart_upload('uploads/multipart')
+    await upload.create()
+    part_size = len(CONTENT) // 3
+    for number in (3, 1, 2):
+        offset = (number - 1) * part_size
+        end = None if number == 3 else offset + part_size
+        await upload.upload_part(CONTENT[offset:end], number)
+
+    resumed = storage.multipart_upload('uploads/multipart', upload.upload_id)
+    resumed.parts = upload.parts
+    await resumed.complete()
+
+    assert await read_all(storage, 'uploads/multipart') == CONTENT
+    assert not list((storage.bucket_dir / '.multipart').iterdir())
+
+
+@pytest.mark.anyio
+async def test_local_storage_aborted_upload(storage):
+    upload = storage.multipart_upload('uploads/aborted')
+    await upload.upload_part(b'data', 1)
+    await upload.abort()
+
+    with pytest.raises(UploadNotFound):
+        await upload.upload_part(b'data', 2)
+    with pytest.raises(UploadNotFound):
+        await upload.complete()
+    assert not await storage.exists('uploads/aborted')
+
+
+@pytest.mark.anyio
+async def test_local_storage_download_response(storage, monkeypatch):
+    monkeypatch.setattr(download, 'storage', storage)
+    file = FileInDB(
+        id=uuid.uuid4(),
+        user_id=1,
+        name='file.bin',
+        path='/',
+        size=len(CONTENT),
+        hash='a' * 64,
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+    )
+    await storage.write_stream(blob_object_name(file.hash), chunks(CONTENT))
+
+    response = await download.build_download_response(file, None)
+    assert isinstance(response, FileResponse)
+    assert response.path == storage.local_path(blob_object_name(file.hash))
+    assert response.headers['content-length'] == str(len(CONTENT))
+    assert response.headers['etag'] == f'"{file.hash}"'
+
+    response = await download.build_download_response(file, [(10, 19)])
+    assert isinstance(response, StreamingResponse)
+    assert response.status_code == 206
+    assert response.headers['content-length'] == '10'
+    body = b''.join([chunk async for chunk in response.body_iterator])
+    assert body == CONTENT[10:20]
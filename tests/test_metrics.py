@@ -0,0 +1,42 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from src.core.metrics import MetricsMiddleware, track_stream
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.anyio
+async def test_track_stream():
+    async def chunks():
+        assert sample('download_streams_in_progress', kind='test') == 1
+        yield b'a'
+        yield b'b'
+
+    result = [chunk async for chunk in track_stream(chunks(), 'test')]
+
+    assert result == [b'a', b'b']
+    assert sample('download_streams_in_progress', kind='test') == 0
+
+
+@pytest.mark.anyio
+async def test_middleware_counts_failed_request():
+    async def app(scope, receive, send):
+        raise RuntimeError
+
+    async def send(message):
+        pass
+
+    labels = {'method': 'PATCH', 'route': 'unmatched', 'status': '500'}
+    before = sample('http_request_duration_seconds_count', **labels)
+    with pytest.raises(RuntimeError):
+        await MetricsMiddleware(app)(
+            {'type': 'http', 'method': 'PATCH'}, None, send
+        )
+
+    assert sample('http_request_duration_seconds_count', **labels) == (
+        before + 1
+    )
+    assert sample('http_requests_in_progress', method='PATCH') == 0
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from src.services.download import (
+    RangeNotSatisfiable,
+    etag_matches,
+    if_range_matches,
+    not_modified,
+    parse_range,
+)
+
+FILE_SIZE = 100
+ETAG = '"d41d8cd98f00b204e9800998ecf8427e"'
+LAST_MODIFIED = datetime(2015, 10, 21, 7, 28, 0, 500000)
+
+
+def test_parse_range():
+    assert parse_range('bytes=0-9', FILE_SIZE) == [(0, 9)]
+    assert parse_range('bytes=90-', FILE_SIZE) == [(90, 99)]
+    assert parse_range('bytes=-10', FILE_SIZE) == [(90, 99)]
+    assert parse_range('bytes=-500', FILE_SIZE) == [(0, 99)]
+    assert parse_range('bytes=95-200', FILE_SIZE) == [(95, 99)]
+    assert parse_range('bytes=0-0, 10-19', FILE_SIZE) == [(0, 0), (10, 19)]
+    assert parse_range('bytes=0-9, 200-300', FILE_SIZE) == [(0, 9)]
+
+
+def test_parse_range_invalid():
+    assert parse_range('items=0-9', FILE_SIZE) is None
+    assert parse_range('bytes=', FILE_SIZE) is None
+    assert parse_range('bytes=9-0', FILE_SIZE) is None
+    assert parse_range('bytes=a-b', FILE_SIZE) is None
+    assert parse_range('bytes=-', FILE_SIZE) is None
+
+
+def test_parse_range_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range('bytes=100-', FILE_SIZE)
+
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range('bytes=-0', FILE_SIZE)
+
+
+def test_if_range_matches():
+    assert if_range_matches(ETAG, ETAG, None)
+    assert not if_range_matches('"other"', ETAG, None)
+    assert not if_range_matches('W/' + ETAG, ETAG, None)
+    assert not if_range_matches('Wed, 21 Oct 2015 07:28:00 GMT', ETAG, None)
+    assert if_range_matches(
+        'Wed, 21 Oct 2015 07:28:00 GMT', ETAG, LAST_MODIFIED
+    )
+
+
+def test_etag_matches():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"other", W/{ETAG}', ETAG)
+    assert etag_matches('*', ETAG)
+    assert not etag_matches('"other"', ETAG)
+
+
+def test_not_modified():
+    assert not_modified(ETAG, LAST_MODIFIED, ETAG, None)
+    assert not not_modified(ETAG, LAST_MODIFIED, '"other"', None)
+    assert not_modified(
+        ETAG, LAST_MODIFIED, None, 'Wed, 21 Oct 2015 07:28:00 GMT'
+    )
+    assert not not_modified(
+        ETAG, LAST_MODIFIED, None, 'Wed, 21 Oct 2015 07:27:59 GMT'
+    )
+    assert not not_modified(
+        ETAG, LAST_MODIFIED, '"other"', 'Wed, 21 Oct 2015 07:28:00 GMT'
+    )
+    assert not not_modified(ETAG, LAST_MODIFIED, None, 'invalid')
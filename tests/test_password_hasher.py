@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException, status
+
+from src.core.auth import PasswordHasher
+
+
+@pytest.mark.anyio
+async def test_password_hasher_runs_off_loop():
+    hasher = PasswordHasher(workers=2, queue_size=10)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    results = await asyncio.gather(
+        *(hasher.run(time.sleep, 0.1) for _ in range(2))
+    )
+    task.cancel()
+    hasher.shutdown()
+
+    assert results == [None, None]
+    assert ticks >= 5
+    assert hasher.completed == 2
+    assert hasher.pending == 0
+    assert hasher.run_seconds >= 0.2
+
+
+@pytest.mark.anyio
+async def test_password_hasher_queue_limit():
+    hasher = PasswordHasher(workers=1, queue_size=2)
+    results = await asyncio.gather(
+        *(hasher.run(time.sleep, 0.05) for _ in range(3)),
+        return_exceptions=True,
+    )
+    hasher.shutdown()
+
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], HTTPException)
+    assert results[2].status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert hasher.rejected == 1
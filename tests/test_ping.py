@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.ping import ServiceProber
+
+
+def make_prober(timeout: float = 0.2) -> tuple[ServiceProber, dict]:
+    calls = {'fast': 0, 'slow': 0, 'broken': 0, 'hanging': 0}
+
+    async def fast():
+        calls['fast'] += 1
+
+    async def slow():
+        calls['slow'] += 1
+        await asyncio.sleep(0.1)
+
+    async def broken():
+        calls['broken'] += 1
+        raise ConnectionRefusedError
+
+    async def hanging():
+        calls['hanging'] += 1
+        await asyncio.sleep(10)
+
+    prober = ServiceProber(
+        probes={
+            'fast': fast,
+            'slow': slow,
+            'broken': broken,
+            'hanging': hanging,
+        },
+        timeout=timeout,
+        interval=60,
+    )
+    return prober, calls
+
+
+@pytest.mark.anyio
+async def test_service_prober_reports_latencies():
+    prober, _ = make_prober()
+
+    started = time.perf_counter()
+    status = await prober.refresh()
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.3
+    assert status['fast'] < 100
+    assert 100 <= status['slow'] < 200
+    assert status['broken'] is None
+    assert status['hanging'] is None
+    assert status['checked_at'] is not None
+
+
+@pytest.mark.anyio
+async def test_service_prober_caches_results():
+    prober, calls = make_prober()
+
+    statuses = await asyncio.gather(
+        *(prober.get_status() for _ in range(10))
+    )
+    assert all(status == statuses[0] for status in statuses)
+    assert calls['slow'] == 1
+
+    await prober.get_status()
+    assert calls['slow'] == 1